@@ -0,0 +1,196 @@
+from collections import OrderedDict, deque
+from dataclasses import astuple, dataclass, field
+from math import inf
+from typing import Hashable, Iterator, Optional
+
+import homework
+
+WEEK = 7 * 24 * 60 * 60
+MAX_KEYS = 100_000
+
+
+@dataclass
+class Stats:
+    """Суммы, количество и экстремумы метрик тренировок."""
+    count: int = 0
+    duration: float = 0.0
+    distance: float = 0.0
+    calories: float = 0.0
+    speed_min: float = inf
+    speed_max: float = -inf
+    calories_min: float = inf
+    calories_max: float = -inf
+
+    def add(self, message: homework.InfoMessage) -> None:
+        """Учесть одну тренировку."""
+        self.count += 1
+        self.duration += message.duration
+        self.distance += message.distance
+        self.calories += message.calories
+        self.speed_min = min(self.speed_min, message.speed)
+        self.speed_max = max(self.speed_max, message.speed)
+        self.calories_min = min(self.calories_min, message.calories)
+        self.calories_max = max(self.calories_max, message.calories)
+
+    def merge(self, other: 'Stats') -> None:
+        """Добавить показатели другой сводки."""
+        self.count += other.count
+        self.duration += other.duration
+        self.distance += other.distance
+        self.calories += other.calories
+        self.speed_min = min(self.speed_min, other.speed_min)
+        self.speed_max = max(self.speed_max, other.speed_max)
+        self.calories_min = min(self.calories_min, other.calories_min)
+        self.calories_max = max(self.calories_max, other.calories_max)
+
+    def get_mean_speed(self) -> float:
+        """Получить среднюю скорость за все тренировки сводки."""
+        return self.distance / self.duration if self.duration else 0.0
+
+
+@dataclass
+class KeyState:
+    """Состояние ключа: общая сводка, окна и время последнего события."""
+    last_seen: float
+    total: Stats = field(default_factory=Stats)
+    panes: deque = field(default_factory=deque)
+
+
+class Aggregator:
+    """Инкрементальные сводки по пользователю и типу тренировки.
+
+    Окно `window` считается из отрезков длиной `step`: без `step` окно
+    скачущее, со `step` меньше `window` — скользящее.
+    """
+
+    def __init__(self, window: float = WEEK, step: Optional[float] = None,
+                 max_keys: int = MAX_KEYS,
+                 ttl: Optional[float] = None) -> None:
+        self.window = window
+        self.step = step or window
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self.keys: OrderedDict[tuple, KeyState] = OrderedDict()
+
+    def add(self, user: Hashable, message: homework.InfoMessage,
+            timestamp: float) -> None:
+        """Учесть результат тренировки пользователя."""
+        key = (user, message.training_type)
+        state = self.keys.get(key)
+        if state is None:
+            state = self.keys[key] = KeyState(timestamp)
+            if len(self.keys) > self.max_keys:
+                self.keys.popitem(last=False)
+        else:
+            self.keys.move_to_end(key)
+            state.last_seen = max(state.last_seen, timestamp)
+        state.total.add(message)
+        self.get_pane(state, timestamp - timestamp % self.step).add(message)
+        while state.panes and (
+            state.panes[0][0] <= state.last_seen - self.window
+        ):
+            state.panes.popleft()
+
+    @staticmethod
+    def get_pane(state: KeyState, start: float) -> Stats:
+        """Найти или создать отрезок окна, начинающийся в `start`."""
+        if not state.panes or state.panes[-1][0] < start:
+            state.panes.append((start, Stats()))
+            return state.panes[-1][1]
+        for index in range(len(state.panes) - 1, -1, -1):
+            pane_start, pane = state.panes[index]
+            if pane_start == start:
+                return pane
+            if pane_start < start:
+                break
+        else:
+            index = -1
+        pane = Stats()
+        state.panes.insert(index + 1, (start, pane))
+        return pane
+
+    def add_training(self, user: Hashable, training: homework.Training,
+                     timestamp: float) -> None:
+        """Рассчитать тренировку и учесть её результат."""
+        self.add(user, training.show_training_info(), timestamp)
+
+    def get_total(self, user: Hashable,
+                  training_type: Optional[str] = None) -> Stats:
+        """Получить сводку за всё время по типу или по всем типам."""
+        stats = Stats()
+        for state in self.iter_states(user, training_type):
+            stats.merge(state.total)
+        return stats
+
+    def get_window(self, user: Hashable, now: float,
+                   training_type: Optional[str] = None) -> Stats:
+        """Получить сводку за окно, заканчивающееся в момент `now`."""
+        stats = Stats()
+        for state in self.iter_states(user, training_type):
+            for pane_start, pane in state.panes:
+                if now - self.window < pane_start <= now:
+                    stats.merge(pane)
+        return stats
+
+    def iter_states(self, user: Hashable,
+                    training_type: Optional[str]) -> Iterator[KeyState]:
+        """Получить состояния ключей пользователя."""
+        if training_type is not None:
+            types = (training_type,)
+        else:
+            types = tuple(
+                training_class.__name__
+                for training_class in homework.TYPES_TRANING.values()
+            )
+        for name in types:
+            state = self.keys.get((user, name))
+            if state is not None:
+                yield state
+
+    def evict(self, now: float) -> int:
+        """Удалить ключи без событий дольше `ttl`, вернуть их число.
+
+        Порядок ключей — порядок поступления событий, а не их времени,
+        поэтому время последнего события проверяется у каждого ключа.
+        """
+        if self.ttl is None:
+            return 0
+        deadline = now - self.ttl
+        stale = [
+            key for key, state in self.keys.items()
+            if state.last_seen <= deadline
+        ]
+        for key in stale:
+            del self.keys[key]
+        return len(stale)
+
+    def snapshot(self) -> dict:
+        """Получить состояние в виде, пригодном для JSON."""
+        return {
+            'window': self.window,
+            'step': self.step,
+            'max_keys': self.max_keys,
+            'ttl': self.ttl,
+            'keys': [
+                [
+                    list(key), state.last_seen, astuple(state.total),
+                    [[start, astuple(pane)] for start, pane in state.panes]
+                ]
+                for key, state in self.keys.items()
+            ],
+        }
+
+    @classmethod
+    def restore(cls, snapshot: dict) -> 'Aggregator':
+        """Восстановить агрегатор из снимка состояния."""
+        aggregator = cls(
+            snapshot['window'], snapshot['step'],
+            snapshot['max_keys'], snapshot['ttl']
+        )
+        for key, last_seen, total, panes in snapshot['keys']:
+            aggregator.keys[tuple(key)] = KeyState(
+                last_seen,
+                Stats(*total),
+                deque((start, Stats(*pane)) for start, pane in panes)
+            )
+        return aggregator
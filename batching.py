@@ -0,0 +1,93 @@
+import asyncio
+from typing import Optional
+
+import homework
+
+MAX_BATCH = 256
+MAX_DELAY = 0.002
+MIN_BATCH = 2
+
+
+class MicroBatcher:
+    """Сбор пакетов от отдельных вызывающих в пачки для расчёта по типам.
+
+    Пачка рассчитывается, когда в ней `size` пакетов или истёк срок.
+    Пока нагрузка низкая, срок — следующий оборот цикла событий, и
+    задержка не растёт. Заполненная пачка удваивает `size` до
+    `max_size`, а следующая пачка ждёт пополнения до `max_delay`
+    секунд; пачка меньше половины `size` уменьшает его вдвое.
+    """
+
+    def __init__(self, max_size: int = MAX_BATCH,
+                 max_delay: float = MAX_DELAY,
+                 min_size: int = MIN_BATCH) -> None:
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.min_size = min_size
+        self.size = min_size
+        self.loaded = False
+        self.pending: list[tuple[str, list[float], asyncio.Future]] = []
+        self.handle: Optional[asyncio.Handle] = None
+        self.batches = 0
+        self.packages = 0
+
+    def submit(self, workout_type: str,
+               data: list[float]) -> asyncio.Future:
+        """Поставить пакет в пачку и получить future его сообщения."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((workout_type, data, future))
+        if len(self.pending) >= self.size:
+            self.flush()
+        elif self.handle is None:
+            if self.loaded:
+                self.handle = loop.call_later(self.max_delay, self.flush)
+            else:
+                self.handle = loop.call_soon(self.flush)
+        return future
+
+    def flush(self) -> None:
+        """Рассчитать накопленную пачку и подстроить её размер."""
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        self.loaded = len(batch) >= self.size
+        if self.loaded:
+            self.size = min(self.size * 2, self.max_size)
+        elif len(batch) < self.size // 2:
+            self.size = max(self.size // 2, self.min_size)
+        self.batches += 1
+        self.packages += len(batch)
+        try:
+            results = homework.calculate_packages(
+                [(workout_type, data) for workout_type, data, _ in batch]
+            )
+        except Exception:
+            self.calculate_each(batch)
+            return
+        for result in results.values():
+            for position, message in zip(
+                result.positions, result.get_info_messages()
+            ):
+                future = batch[position][2]
+                if not future.done():
+                    future.set_result(message)
+
+    @staticmethod
+    def calculate_each(batch: list[tuple[str, list[float], asyncio.Future]]
+                       ) -> None:
+        """Рассчитать пакеты по одному, передав ошибки их вызывающим."""
+        for workout_type, data, future in batch:
+            if future.done():
+                continue
+            try:
+                future.set_result(
+                    homework.read_package(
+                        workout_type, data
+                    ).show_training_info()
+                )
+            except Exception as error:
+                future.set_exception(error)
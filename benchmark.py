@@ -0,0 +1,196 @@
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from io import StringIO
+from typing import Callable, Optional
+
+import homework
+
+PACKAGE_COUNT = 10000
+REPEAT = 5
+TOLERANCE = 0.1
+BASELINE_PATH = 'benchmark_baseline.json'
+REPORT_LINE = '{name:<40} {ops:>14,.0f} оп/с'
+MEMORY_LINE = '{name:<40} {size:>14,.1f} байт/запись'
+REGRESSION_LINE = (
+    'Регрессия {name}: {current:,.0f} оп/с против {baseline:,.0f} оп/с '
+    'в базовом замере'
+)
+
+
+def generate_packages(count: int = PACKAGE_COUNT,
+                      seed: int = 0) -> list[tuple[str, list[float]]]:
+    """Сгенерировать синтетические пакеты для всех типов тренировок."""
+    generator = random.Random(seed)
+    extra = {
+        'SWM': lambda: [generator.uniform(10, 50), generator.randint(1, 80)],
+        'RUN': lambda: [],
+        'WLK': lambda: [generator.uniform(140, 210)],
+    }
+    packages = []
+    for index in range(count):
+        workout_type = list(extra)[index % len(extra)]
+        data = [
+            generator.randint(100, 30000),
+            generator.uniform(0.2, 3),
+            generator.uniform(40, 120),
+        ]
+        packages.append((workout_type, data + extra[workout_type]()))
+    return packages
+
+
+def measure(function: Callable[[], object], count: int,
+            repeat: int = REPEAT) -> float:
+    """Получить лучшую из повторов скорость в операциях в секунду."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+
+def measure_memory(function: Callable[[], object], count: int) -> float:
+    """Получить объём памяти на одну запись, созданную функцией."""
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        result = function()
+        size = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    del result
+    return size / count
+
+
+def run_main(trainings: list[homework.Training]) -> None:
+    """Вызвать main для всех тренировок с выводом в буфер."""
+    with redirect_stdout(StringIO()):
+        for training in trainings:
+            homework.main(training)
+
+
+def write_report(messages: list[homework.InfoMessage],
+                 output_format: str) -> None:
+    """Записать отчёт о сообщениях в буфер."""
+    with homework.ReportWriter(StringIO(), output_format) as writer:
+        writer.write_messages(messages)
+
+
+def run_benchmarks(count: int = PACKAGE_COUNT,
+                   repeat: int = REPEAT) -> dict[str, dict[str, float]]:
+    """Замерить скорость и память основных этапов обработки пакетов."""
+    packages = generate_packages(count)
+    lines = [
+        ','.join([workout_type, *map(str, data)]).encode('ascii')
+        for workout_type, data in packages
+    ]
+    trainings = [homework.read_package(*package) for package in packages]
+    messages = [training.show_training_info() for training in trainings]
+    speed = {
+        'read_package': measure(
+            lambda: [homework.read_package(*package) for package in packages],
+            count, repeat
+        ),
+        'InfoMessage.get_message': measure(
+            lambda: [message.get_message() for message in messages],
+            count, repeat
+        ),
+        'main': measure(lambda: run_main(trainings), count, repeat),
+        'PacketParser.iter_trainings': measure(
+            lambda: list(homework.PacketParser().iter_trainings(lines)),
+            count, repeat
+        ),
+        'PacketParser.parse_tables': measure(
+            lambda: homework.PacketParser().parse_tables(lines),
+            count, repeat
+        ),
+    }
+    for output_format in ('text', 'compact'):
+        speed[f'ReportWriter[{output_format}]'] = measure(
+            lambda: write_report(messages, output_format), count, repeat
+        )
+    for training_class in homework.TYPES_TRANING.values():
+        selected = [
+            training for training in trainings
+            if type(training) is training_class
+        ]
+        speed[f'{training_class.__name__}.get_spent_calories'] = measure(
+            lambda: [training.get_spent_calories() for training in selected],
+            len(selected), repeat
+        )
+        table = homework.TrainingTable(training_class)
+        table.extend(
+            data for workout_type, data in packages
+            if homework.TYPES_TRANING[workout_type] is training_class
+        )
+        speed[f'{training_class.__name__}.calculate_batch'] = measure(
+            table.calculate, len(table), repeat
+        )
+    memory = {
+        'Training': measure_memory(
+            lambda: [homework.read_package(*package) for package in packages],
+            count
+        ),
+        'InfoMessage': measure_memory(
+            lambda: [training.show_training_info() for training in trainings],
+            count
+        ),
+    }
+    return {'speed': speed, 'memory': memory}
+
+
+def find_regressions(results: dict[str, dict[str, float]],
+                     baseline: dict[str, dict[str, float]],
+                     tolerance: float = TOLERANCE) -> list[str]:
+    """Найти замеры, которые медленнее базовых больше чем на допуск."""
+    regressions = []
+    for name, current in results['speed'].items():
+        expected = baseline['speed'].get(name)
+        if expected is not None and current < expected * (1 - tolerance):
+            regressions.append(REGRESSION_LINE.format(
+                name=name, current=current, baseline=expected
+            ))
+    return regressions
+
+
+def print_report(results: dict[str, dict[str, float]]) -> None:
+    """Вывести результаты замеров."""
+    for name, ops in results['speed'].items():
+        print(REPORT_LINE.format(name=name, ops=ops))
+    for name, size in results['memory'].items():
+        print(MEMORY_LINE.format(name=name, size=size))
+
+
+def run(argv: Optional[list[str]] = None) -> int:
+    """Запустить замеры, сохранить или сравнить с базовым замером."""
+    parser = argparse.ArgumentParser(description='Замеры homework.py.')
+    parser.add_argument('--count', type=int, default=PACKAGE_COUNT)
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+    results = run_benchmarks(args.count, args.repeat)
+    print_report(results)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+        return 0
+    try:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+    except FileNotFoundError:
+        return 0
+    regressions = find_regressions(results, baseline, args.tolerance)
+    for line in regressions:
+        print(line)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
@@ -0,0 +1,200 @@
+import argparse
+import json
+import os
+import time
+from dataclasses import astuple
+from itertools import islice
+from typing import BinaryIO, Optional
+
+import aggregation
+import homework
+
+CHECKPOINT_INTERVAL = 10.0
+CHECKPOINT_SUFFIX = '.checkpoint'
+PHRASE_STDIN_ERROR = 'возобновляемый расчёт требует файл, а не stdin'
+PHRASE_SOURCE_ERROR = 'контрольная точка {} записана для другого входа: {}'
+PHRASE_FORMAT_ERROR = 'контрольная точка {} записана с {}={}, а не {}'
+PHRASE_TARGET_ERROR = 'отчёт {} короче позиции {} из контрольной точки'
+CHECKPOINT_FORMATS = ('package_format', 'output_format')
+
+
+def load_checkpoint(path: str) -> Optional[dict]:
+    """Прочитать контрольную точку или None, если её нет."""
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path: str, state: dict) -> None:
+    """Атомарно заменить контрольную точку, дождавшись записи на диск."""
+    with open(path + '.tmp', 'w', encoding='utf-8') as file:
+        json.dump(state, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(path + '.tmp', path)
+
+
+class CheckpointedRun:
+    """Расчёт файла пакетов, продолжаемый с последней контрольной точки.
+
+    Не чаще раза в `interval` секунд, на границе пачки, отчёт
+    сбрасывается на диск, после чего атомарно сохраняются смещение во
+    входе, позиция в отчёте и сводки по типам. При перезапуске отчёт
+    обрезается до сохранённой позиции, поэтому строки, записанные после
+    точки, не повторяются.
+    """
+
+    def __init__(self, source: str, target: str,
+                 checkpoint: Optional[str] = None,
+                 package_format: str = 'csv',
+                 output_format: str = 'text',
+                 interval: float = CHECKPOINT_INTERVAL,
+                 batch_size: int = homework.CHUNK_SIZE) -> None:
+        self.source = source
+        self.target = target
+        self.checkpoint = checkpoint or target + CHECKPOINT_SUFFIX
+        self.package_format = package_format
+        self.output_format = output_format
+        self.interval = interval
+        self.batch_size = batch_size
+        self.offset = 0
+        self.position = 0
+        self.count = 0
+        self.checkpoints = 0
+        self.stats: dict[str, aggregation.Stats] = {}
+
+    def restore(self, state: dict) -> None:
+        """Восстановить смещения и сводки из контрольной точки."""
+        if state['source'] != os.path.abspath(self.source):
+            raise ValueError(
+                PHRASE_SOURCE_ERROR.format(self.checkpoint, state['source'])
+            )
+        for name in CHECKPOINT_FORMATS:
+            if state.get(name) != getattr(self, name):
+                raise ValueError(PHRASE_FORMAT_ERROR.format(
+                    self.checkpoint, name, state.get(name),
+                    getattr(self, name)
+                ))
+        self.offset = state['offset']
+        self.position = state['position']
+        self.count = state['count']
+        self.stats = {
+            name: aggregation.Stats(*values)
+            for name, values in state['stats'].items()
+        }
+
+    def save(self, done: bool = False) -> None:
+        """Сохранить контрольную точку для записанной части отчёта."""
+        save_checkpoint(self.checkpoint, {
+            'source': os.path.abspath(self.source),
+            'package_format': self.package_format,
+            'output_format': self.output_format,
+            'offset': self.offset,
+            'position': self.position,
+            'count': self.count,
+            'done': done,
+            'stats': {
+                name: astuple(stats) for name, stats in self.stats.items()
+            },
+        })
+        self.checkpoints += 1
+
+    def add(self, messages: list[homework.InfoMessage]) -> None:
+        """Учесть сообщения в сводках по типам."""
+        for message in messages:
+            stats = self.stats.get(message.training_type)
+            if stats is None:
+                stats = self.stats[message.training_type] = (
+                    aggregation.Stats()
+                )
+            stats.add(message)
+
+    def run(self) -> dict[str, aggregation.Stats]:
+        """Рассчитать вход до конца, продолжив с контрольной точки."""
+        if self.source == '-':
+            raise ValueError(PHRASE_STDIN_ERROR)
+        state = load_checkpoint(self.checkpoint)
+        if state is not None:
+            self.restore(state)
+            if state['done']:
+                return self.stats
+        descriptor = os.open(self.target, os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(descriptor).st_size < self.position:
+                raise ValueError(
+                    PHRASE_TARGET_ERROR.format(self.target, self.position)
+                )
+            os.ftruncate(descriptor, self.position)
+            os.lseek(descriptor, self.position, os.SEEK_SET)
+            with homework.open_input(self.source, 'rb') as stream:
+                stream.seek(self.offset)
+                self.process(stream, descriptor, header=state is None)
+        finally:
+            os.close(descriptor)
+        return self.stats
+
+    def process(self, stream: BinaryIO, descriptor: int,
+                header: bool) -> None:
+        writer = homework.ReportWriter(
+            descriptor, self.output_format, header=header
+        )
+        last = time.monotonic()
+        while lines := list(islice(stream, self.batch_size)):
+            messages = list(homework.iter_messages(homework.iter_packages(
+                b''.join(lines).decode('utf-8').splitlines(),
+                self.package_format
+            )))
+            writer.write_messages(messages)
+            self.add(messages)
+            self.offset += sum(map(len, lines))
+            self.count += len(messages)
+            if time.monotonic() - last >= self.interval:
+                self.commit(writer, descriptor)
+                last = time.monotonic()
+        self.commit(writer, descriptor, done=True)
+
+    def commit(self, writer: homework.ReportWriter, descriptor: int,
+               done: bool = False) -> None:
+        """Сбросить отчёт на диск и сохранить контрольную точку."""
+        writer.flush()
+        os.fsync(descriptor)
+        self.position = os.lseek(descriptor, 0, os.SEEK_CUR)
+        self.save(done)
+
+
+def run(argv: Optional[list[str]] = None) -> None:
+    """Рассчитать файл пакетов с контрольными точками."""
+    parser = argparse.ArgumentParser(
+        description='Возобновляемый расчёт пакетов.'
+    )
+    parser.add_argument('source')
+    parser.add_argument('target')
+    parser.add_argument('--checkpoint', help='файл контрольной точки')
+    parser.add_argument(
+        '--format', choices=homework.PACKAGE_FORMATS, default='csv'
+    )
+    parser.add_argument(
+        '--output-format', choices=homework.OUTPUT_FORMATS, default='text'
+    )
+    parser.add_argument(
+        '--interval', type=float, default=CHECKPOINT_INTERVAL,
+        help='наименьший промежуток между контрольными точками в секундах'
+    )
+    parser.add_argument('--summary', help='файл для сводок по типам')
+    args = parser.parse_args(argv)
+    stats = CheckpointedRun(
+        args.source, args.target, args.checkpoint, args.format,
+        args.output_format, args.interval
+    ).run()
+    if args.summary is not None:
+        with open(args.summary, 'w', encoding='utf-8') as file:
+            json.dump(
+                {name: astuple(values) for name, values in stats.items()},
+                file, indent=2
+            )
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,239 @@
+import argparse
+import heapq
+import os
+import sys
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+from typing import Iterable, Iterator, Optional, TextIO
+
+import homework
+import replay
+
+MEMORY_LIMIT = 64 * 1024 * 1024
+MERGE_BUFFER = 64 * 1024
+RUN_MEMORY = 2 * MERGE_BUFFER
+MAX_FAN_IN = 64
+BATCH_ROW_MEMORY = 256
+WRITER_BLOCK = 32 * 1024
+BLOCK_CHAR_MEMORY = 6
+FLOAT_SIZE = sys.getsizeof(0.0)
+FIELD_SEPARATOR = '\t'
+PHRASE_MEMORY_LIMIT_ERROR = (
+    'лимит памяти {} байт меньше буферов слияния двух серий ({} байт)'
+)
+
+Record = tuple[str, str, int, list[float]]
+get_group = itemgetter(0, 1)
+
+
+def get_record_size(record: Record) -> int:
+    """Оценить память записи в буфере сортировки вместе со ссылкой на неё."""
+    workout_type, user, index, data = record
+    return (
+        sys.getsizeof(record) + sys.getsizeof(user) + sys.getsizeof(index)
+        + sys.getsizeof(data) + FLOAT_SIZE * len(data) + 8
+    )
+
+
+def write_run(records: Iterable[Record], path: str) -> None:
+    """Записать отсортированную серию записей в файл."""
+    with open(path, 'w', encoding='utf-8', buffering=MERGE_BUFFER) as file:
+        file.writelines(
+            f'{code}\t{user}\t{index}\t{",".join(map(repr, data))}\n'
+            for code, user, index, data in records
+        )
+
+
+def read_run(path: str) -> Iterator[Record]:
+    """Читать записи серии из файла."""
+    with open(path, encoding='utf-8', buffering=MERGE_BUFFER) as file:
+        for line in file:
+            code, user, index, data = line.rstrip('\n').split(
+                FIELD_SEPARATOR
+            )
+            yield code, user, int(index), [
+                float(value) for value in data.split(',')
+            ]
+
+
+class ExternalSorter:
+    """Сортировка записей по коду типа и пользователю с лимитом памяти.
+
+    Записи копятся в буфере, пока вместе с буфером записи серии они
+    укладываются в `memory_limit` байт, затем буфер
+    сортируется и сбрасывается серией во временный файл. Серии
+    сливаются k-путевым слиянием; число одновременно открытых серий
+    ограничено так, чтобы их буферы чтения и декодирования, а также
+    буфер записи промежуточной серии тоже укладывались в лимит.
+    """
+
+    def __init__(self, memory_limit: int = MEMORY_LIMIT,
+                 directory: Optional[str] = None) -> None:
+        self.fan_in = min(memory_limit // RUN_MEMORY - 1, MAX_FAN_IN)
+        if self.fan_in < 2:
+            raise ValueError(PHRASE_MEMORY_LIMIT_ERROR.format(
+                memory_limit, 3 * RUN_MEMORY
+            ))
+        self.memory_limit = memory_limit
+        self.buffer_limit = memory_limit - RUN_MEMORY
+        self.directory = tempfile.TemporaryDirectory(dir=directory)
+        self.records: list[Record] = []
+        self.size = 0
+        self.runs: list[str] = []
+        self.spills = 0
+
+    def __enter__(self) -> 'ExternalSorter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def add(self, workout_type: str, user: str, index: int,
+            data: list[float]) -> None:
+        """Добавить пакет, сбросив серию при достижении лимита памяти."""
+        homework.get_workout_type(workout_type, len(data))
+        record = workout_type, user, index, data
+        self.records.append(record)
+        self.size += get_record_size(record)
+        if self.size >= self.buffer_limit:
+            self.spill()
+
+    def get_run_path(self) -> str:
+        self.spills += 1
+        return os.path.join(self.directory.name, f'{self.spills}.run')
+
+    def spill(self) -> None:
+        """Отсортировать буфер и записать его серией во временный файл."""
+        if not self.records:
+            return
+        self.records.sort()
+        path = self.get_run_path()
+        write_run(self.records, path)
+        self.runs.append(path)
+        self.records.clear()
+        self.size = 0
+
+    def merge_runs(self) -> None:
+        """Сливать серии группами, пока их не станет не больше `fan_in`."""
+        while len(self.runs) > self.fan_in:
+            group = self.runs[:self.fan_in]
+            path = self.get_run_path()
+            write_run(heapq.merge(*map(read_run, group)), path)
+            for name in group:
+                os.remove(name)
+            self.runs = self.runs[self.fan_in:] + [path]
+
+    def __iter__(self) -> Iterator[Record]:
+        """Получить все записи по порядку кода, пользователя и строки."""
+        if not self.runs:
+            self.records.sort()
+            yield from self.records
+            return
+        self.spill()
+        self.merge_runs()
+        yield from heapq.merge(*map(read_run, self.runs))
+
+    def close(self) -> None:
+        """Удалить временные серии."""
+        self.records.clear()
+        self.directory.cleanup()
+
+
+def iter_batches(records: Iterable[Record],
+                 batch_size: int = homework.CHUNK_SIZE
+                 ) -> Iterator[tuple[str, homework.BatchResult]]:
+    """Рассчитать группы одного типа и пользователя пачками.
+
+    В `positions` результата — номера строк пакетов во входе.
+    """
+    for (workout_type, user), group in groupby(records, get_group):
+        training_class = homework.WORKOUT_TYPES[workout_type].training_class
+        table = homework.TrainingTable(training_class)
+        positions = []
+        for _, _, index, data in group:
+            table.append(data)
+            positions.append(index)
+            if len(positions) == batch_size:
+                result = table.calculate()
+                result.positions = positions
+                yield user, result
+                table = homework.TrainingTable(training_class)
+                positions = []
+        if positions:
+            result = table.calculate()
+            result.positions = positions
+            yield user, result
+
+
+def iter_grouped(stream: Iterable[str], package_format: str = 'csv',
+                 memory_limit: int = MEMORY_LIMIT,
+                 batch_size: int = homework.CHUNK_SIZE,
+                 directory: Optional[str] = None
+                 ) -> Iterator[tuple[str, homework.BatchResult]]:
+    """Сгруппировать пакеты потока внешней сортировкой и рассчитать.
+
+    Из `memory_limit` резервируется память под пачку расчёта размером
+    `batch_size`, остаток отдаётся сортировке.
+    """
+    with ExternalSorter(
+        memory_limit - batch_size * BATCH_ROW_MEMORY, directory
+    ) as sorter:
+        for index, line in enumerate(stream):
+            user, separator, package = line.partition(replay.KEY_SEPARATOR)
+            if not separator:
+                user, package = '', line
+            if not package.strip():
+                continue
+            workout_type, data = homework.parse_package(
+                package, package_format
+            )
+            sorter.add(workout_type, user, index, data)
+        yield from iter_batches(sorter, batch_size)
+
+
+def write_grouped(stream: Iterable[str], output: TextIO,
+                  package_format: str = 'csv',
+                  output_format: str = 'text',
+                  memory_limit: int = MEMORY_LIMIT,
+                  block_size: int = WRITER_BLOCK) -> int:
+    """Вывести отчёт, сгруппированный по типу и пользователю.
+
+    Из `memory_limit` резервируется память под блок записи отчёта
+    размером `block_size` символов: строки блока и их склейку.
+    """
+    with homework.ReportWriter(output, output_format, block_size) as writer:
+        for _, result in iter_grouped(
+            stream, package_format,
+            memory_limit - block_size * BLOCK_CHAR_MEMORY
+        ):
+            writer.write_rows(result.get_rows())
+    return writer.count
+
+
+def run(argv: Optional[list[str]] = None) -> None:
+    """Вывести отчёт по файлу пакетов, сгруппированному по типам."""
+    parser = argparse.ArgumentParser(
+        description='Группировка пакетов внешней сортировкой.'
+    )
+    parser.add_argument('source', help='файл с пакетами, `-` для stdin')
+    parser.add_argument(
+        '--format', choices=homework.PACKAGE_FORMATS, default='csv'
+    )
+    parser.add_argument(
+        '--output-format', choices=homework.OUTPUT_FORMATS, default='text'
+    )
+    parser.add_argument(
+        '--memory-limit', type=int, default=MEMORY_LIMIT,
+        help='лимит памяти буфера сортировки в байтах'
+    )
+    args = parser.parse_args(argv)
+    with homework.open_input(args.source) as stream:
+        write_grouped(
+            stream, sys.stdout, args.format, args.output_format,
+            args.memory_limit
+        )
+
+
+if __name__ == '__main__':
+    run()
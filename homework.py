@@ -1,8 +1,106 @@
-from dataclasses import dataclass, asdict, fields
+import os
+import sys
+from array import array
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from functools import wraps
+from io import IOBase, StringIO, TextIOBase
+from itertools import islice, repeat
+from operator import attrgetter
 
+INSTRUMENTATION = None
 
-@dataclass
-class InfoMessage:
+
+def compile_message(template: str, spec: str | None = None) -> str:
+    """Перевести шаблон str.format в %-шаблон с позиционными полями.
+
+    Если задан `spec`, он заменяет форматы всех полей.
+    """
+    parts = []
+    rest = template
+    while rest:
+        literal, brace, rest = rest.partition('{')
+        parts.append(literal.replace('}}', '}').replace('%', '%%'))
+        if not brace:
+            break
+        if rest.startswith('{'):
+            parts.append('{')
+            rest = rest[1:]
+            continue
+        replacement, _, rest = rest.partition('}')
+        field_spec = replacement.partition(':')[2]
+        parts.append('%' + (spec or field_spec or 's'))
+    return ''.join(parts)
+
+
+INIT_TEMPLATE = 'def __init__(self{}):\n{}'
+INIT_FIELD_TEMPLATE = '    self.{0} = {0}\n'
+
+
+def make_init(field_names: tuple[str, ...],
+              defaults: tuple = ()) -> Callable[..., None]:
+    """Собрать __init__, присваивающий поля по порядку, без dataclasses."""
+    source = INIT_TEMPLATE.format(
+        ''.join(', ' + name for name in field_names),
+        ''.join(map(INIT_FIELD_TEMPLATE.format, field_names)) or '    pass\n'
+    )
+    namespace: dict[str, Callable[..., None]] = {}
+    exec(source, {}, namespace)
+    init = namespace['__init__']
+    init.__defaults__ = defaults or None
+    return init
+
+
+class Record:
+    """Основа записей с полями из аннотаций класса.
+
+    Вместо dataclasses: при создании подкласса поля дописываются к
+    полям родителя в `_fields`, и, если класс не задал свой
+    `__init__`, для него собирается конструктор с этими полями.
+    Значения по умолчанию берутся из атрибутов класса с именами полей.
+    """
+    __slots__ = ()
+    _fields: tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        annotations = cls.__dict__.get('__annotations__', {})
+        own = tuple(name for name in annotations if not name.isupper())
+        if not own:
+            return
+        cls._fields = cls._fields + own
+        if '__init__' not in cls.__dict__:
+            defaults = []
+            for name in reversed(cls._fields):
+                if name not in cls.__dict__:
+                    break
+                defaults.insert(0, cls.__dict__[name])
+            init = make_init(cls._fields, tuple(defaults))
+            init.__qualname__ = f'{cls.__qualname__}.__init__'
+            cls.__init__ = init
+
+    def __repr__(self) -> str:
+        return '{}({})'.format(type(self).__qualname__, ', '.join(
+            f'{name}={getattr(self, name)!r}' for name in self._fields
+        ))
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name)
+            for name in self._fields
+        )
+
+    __hash__ = None
+
+
+def get_field_names(record_class: type) -> tuple[str, ...]:
+    """Получить имена полей записи или класса тренировки по порядку."""
+    return record_class._fields
+
+
+class InfoMessage(Record):
     """Информационное сообщение о тренировке."""
     training_type: str
     duration: float
@@ -18,12 +116,114 @@ class InfoMessage:
         'Потрачено ккал: {calories:.3f}.'
     )
 
+    MESSAGE_TEMPLATE = compile_message(MESSAGE)
+    EXPANDED_TEMPLATE = compile_message(MESSAGE, 's')
+
     def get_message(self) -> str:
-        return self.MESSAGE.format(**asdict(self))
+        values = (
+            self.training_type,
+            self.duration,
+            self.distance,
+            self.speed,
+            self.calories
+        )
+        if INSTRUMENTATION is None:
+            return self.MESSAGE_TEMPLATE % values
+        return INSTRUMENTATION.measure(
+            'get_message', self.training_type,
+            self.MESSAGE_TEMPLATE.__mod__, values
+        )
+
+
+MESSAGE_FIELDS = ('training_type', 'duration', 'distance', 'speed', 'calories')
+get_message_row = attrgetter(*MESSAGE_FIELDS)
+
+
+class BatchResult(Record):
+    """Результаты расчёта для пачки тренировок одного типа."""
+    training_type: str
+    duration: list[float]
+    distance: list[float]
+    speed: list[float]
+    calories: list[float]
+    positions: list[int]
+
+    def __init__(self, training_type: str, duration: list[float],
+                 distance: list[float], speed: list[float],
+                 calories: list[float],
+                 positions: list[int] | None = None) -> None:
+        self.training_type = training_type
+        self.duration = duration
+        self.distance = distance
+        self.speed = speed
+        self.calories = calories
+        self.positions = [] if positions is None else positions
 
+    def __len__(self) -> int:
+        return len(self.duration)
 
-@dataclass
-class Training:
+    def get_rows(self) -> Iterator[tuple]:
+        """Получить значения сообщений без создания InfoMessage."""
+        return zip(
+            repeat(self.training_type),
+            self.duration,
+            self.distance,
+            self.speed,
+            self.calories
+        )
+
+    def get_info_messages(self) -> list[InfoMessage]:
+        """Получить информационные сообщения для каждой тренировки."""
+        return [
+            InfoMessage(self.training_type, *row)
+            for row in zip(
+                self.duration, self.distance, self.speed, self.calories
+            )
+        ]
+
+
+BATCH_METHODS = (
+    ('get_distance', 'get_batch_distance'),
+    ('get_mean_speed', 'get_batch_mean_speed'),
+    ('get_spent_calories', 'get_batch_spent_calories'),
+)
+
+
+class TrainingMeta(type):
+    """Метакласс, собирающий и обновляющий коэффициенты тренировок."""
+    version = 0
+
+    def __init__(cls, name: str, bases: tuple, namespace: dict) -> None:
+        super().__init__(name, bases, namespace)
+        cls.coefficients = cls.get_coefficients()
+
+    def __setattr__(cls, name: str, value: object) -> None:
+        super().__setattr__(name, value)
+        if name.isupper():
+            cls.compile_coefficients()
+            variant = SLOTTED_TYPES.get(cls)
+            if variant is not None:
+                setattr(variant, name, value)
+
+    def __delattr__(cls, name: str) -> None:
+        super().__delattr__(name)
+        if name.isupper():
+            cls.compile_coefficients()
+            variant = SLOTTED_TYPES.get(cls)
+            if variant is not None and name in vars(variant):
+                delattr(variant, name)
+
+    def compile_coefficients(cls) -> None:
+        """Пересобрать коэффициенты класса и его наследников."""
+        TrainingMeta.version += 1
+        classes = [cls]
+        while classes:
+            training_class = classes.pop()
+            training_class.coefficients = training_class.get_coefficients()
+            classes.extend(training_class.__subclasses__())
+
+
+class Training(Record, metaclass=TrainingMeta):
     """Базовый класс тренировки."""
     LEN_STEP = 0.65
     MIN_IN_H = 60
@@ -48,31 +248,132 @@ class Training:
             'еще не реализована.'
         )
 
+    @classmethod
+    def get_coefficients(cls) -> tuple[float, ...]:
+        """Получить коэффициенты формулы калорий, свёрнутые заранее."""
+        return ()
+
     def show_training_info(self) -> InfoMessage:
+        if INSTRUMENTATION is None:
+            calories = self.get_spent_calories()
+        else:
+            calories = INSTRUMENTATION.measure(
+                'get_spent_calories', type(self).__name__,
+                self.get_spent_calories
+            )
         return InfoMessage(
             type(self).__name__,
             self.duration,
             self.get_distance(),
             self.get_mean_speed(),
-            self.get_spent_calories()
+            calories
+        )
+
+    @classmethod
+    def get_batch_distance(cls, action: list[float]) -> list[float]:
+        """Получить дистанции в км для пачки тренировок."""
+        return [value * cls.LEN_STEP / cls.M_IN_KM for value in action]
+
+    @classmethod
+    def has_scalar_overrides(cls) -> bool:
+        """Проверить, переопределена ли скалярная формула ниже пакетной.
+
+        Наследник, заменивший только `get_spent_calories`, иначе получил
+        бы в пачке калории по пакетной формуле родителя.
+        """
+        owners = {
+            name: next(
+                index for index, base in enumerate(cls.__mro__)
+                if name in vars(base)
+            )
+            for pair in BATCH_METHODS for name in pair
+        }
+        return any(owners[scalar] < owners[batch]
+                   for scalar, batch in BATCH_METHODS)
+
+    @classmethod
+    def calculate_batch(cls, action: list[float], duration: list[float],
+                        weight: list[float], *columns) -> BatchResult:
+        """Рассчитать дистанцию, скорость и калории для пачки тренировок."""
+        count = len(action)
+        if any(
+            len(column) != count for column in (duration, weight, *columns)
+        ):
+            raise ValueError(PHRASE_BATCH_LENGTH_ERROR.format(cls.__name__))
+        if cls.has_scalar_overrides():
+            messages = [
+                cls(*row).show_training_info()
+                for row in zip(action, duration, weight, *columns)
+            ]
+            return BatchResult(
+                cls.__name__,
+                list(duration),
+                [message.distance for message in messages],
+                [message.speed for message in messages],
+                [message.calories for message in messages]
+            )
+        distance = cls.get_batch_distance(action)
+        speed = cls.get_batch_mean_speed(distance, duration, *columns)
+        return BatchResult(
+            cls.__name__,
+            list(duration),
+            distance,
+            speed,
+            cls.get_batch_spent_calories(speed, duration, weight, *columns)
+        )
+
+    @classmethod
+    def get_batch_mean_speed(cls, distance: list[float],
+                             duration: list[float], *columns) -> list[float]:
+        """Получить средние скорости для пачки тренировок."""
+        return [value / time for value, time in zip(distance, duration)]
+
+    @classmethod
+    def get_batch_spent_calories(cls, speed: list[float],
+                                 duration: list[float],
+                                 weight: list[float],
+                                 *columns) -> list[float]:
+        """Получить затраченные калории для пачки тренировок."""
+        raise NotImplementedError(
+            f'метод или функция класса {cls.__name__} '
+            'еще не реализована.'
         )
 
 
-@dataclass
 class Running(Training):
     """Тренировка: бег."""
     CALORIES_MEAN_SPEED_MULTIPLIER = 18
     CALORIES_MEAN_SPEED_SHIFT = 1.79
 
+    @classmethod
+    def get_coefficients(cls) -> tuple[float, ...]:
+        """Получить коэффициенты формулы калорий, свёрнутые заранее."""
+        return (
+            cls.CALORIES_MEAN_SPEED_MULTIPLIER,
+            cls.CALORIES_MEAN_SPEED_SHIFT,
+            cls.MIN_IN_H / cls.M_IN_KM,
+        )
+
     def get_spent_calories(self) -> float:
         """Получить количество затраченных калорий."""
+        multiplier, shift, factor = self.coefficients
         return (
-            self.CALORIES_MEAN_SPEED_MULTIPLIER * self.get_mean_speed()
-            + self.CALORIES_MEAN_SPEED_SHIFT
-        ) * (self.weight / self.M_IN_KM) * (self.duration * self.MIN_IN_H)
+            (multiplier * self.get_mean_speed() + shift)
+            * self.weight * self.duration * factor
+        )
+
+    @classmethod
+    def get_batch_spent_calories(cls, speed: list[float],
+                                 duration: list[float],
+                                 weight: list[float]) -> list[float]:
+        """Получить затраченные калории для пачки тренировок."""
+        multiplier, shift, factor = cls.coefficients
+        return [
+            (multiplier * mean_speed + shift) * mass * time * factor
+            for mean_speed, time, mass in zip(speed, duration, weight)
+        ]
 
 
-@dataclass
 class SportsWalking(Training):
     """Тренировка: спортивная ходьба."""
     CALORIES_MULTIPLICATION_SPEED = 0.035
@@ -83,21 +384,41 @@ class SportsWalking(Training):
 
     KM_H_TO_M_S = round(Training.M_IN_KM / Training.MIN_IN_H**2, 3)
 
+    @classmethod
+    def get_coefficients(cls) -> tuple[float, ...]:
+        """Получить коэффициенты формулы калорий, свёрнутые заранее."""
+        return (
+            cls.CALORIES_MULTIPLICATION_SPEED * cls.MIN_IN_H,
+            cls.KM_H_TO_M_S**2 * cls.CM_TO_M
+            * cls.CALORIES_MULTIPLICATION_HEIGHT * cls.MIN_IN_H,
+        )
+
     def get_spent_calories(self) -> float:
         """Получить количество затраченных калорий."""
+        weight_factor, speed_factor = self.coefficients
+        mean_speed = self.get_mean_speed()
         return (
+            weight_factor + speed_factor * mean_speed * mean_speed
+            / self.height
+        ) * self.weight * self.duration
+
+    @classmethod
+    def get_batch_spent_calories(cls, speed: list[float],
+                                 duration: list[float],
+                                 weight: list[float],
+                                 height: list[float]) -> list[float]:
+        """Получить затраченные калории для пачки тренировок."""
+        weight_factor, speed_factor = cls.coefficients
+        return [
             (
-                self.CALORIES_MULTIPLICATION_SPEED * self.weight
-                + (
-                    (self.get_mean_speed() * self.KM_H_TO_M_S)**2
-                    / self.height * self.CM_TO_M
-                )
-                * self.CALORIES_MULTIPLICATION_HEIGHT * self.weight
-            )
-        ) * self.duration * self.MIN_IN_H
+                weight_factor + speed_factor * mean_speed * mean_speed
+                / growth
+            ) * mass * time
+            for mean_speed, time, mass, growth
+            in zip(speed, duration, weight, height)
+        ]
 
 
-@dataclass
 class Swimming(Training):
     """Тренировка: плавание."""
     LEN_STEP = 1.38
@@ -113,11 +434,88 @@ class Swimming(Training):
             self.length_pool * self.count_pool / self.M_IN_KM / self.duration
         )
 
+    @classmethod
+    def get_coefficients(cls) -> tuple[float, ...]:
+        """Получить коэффициенты формулы калорий, свёрнутые заранее."""
+        return cls.MEAN_SPEED_ADDITION, cls.CALORIES_BURNRATE_MULTIPLICATION
+
     def get_spent_calories(self) -> float:
         """Получить количество затраченных калорий."""
+        addition, multiplier = self.coefficients
         return (
-            (self.get_mean_speed() + self.MEAN_SPEED_ADDITION)
-        ) * self.CALORIES_BURNRATE_MULTIPLICATION * self.weight * self.duration
+            (self.get_mean_speed() + addition)
+            * multiplier * self.weight * self.duration
+        )
+
+    @classmethod
+    def get_batch_mean_speed(cls, distance: list[float],
+                             duration: list[float],
+                             length_pool: list[float],
+                             count_pool: list[int]) -> list[float]:
+        """Получить средние скорости для пачки тренировок."""
+        return [
+            length * count / cls.M_IN_KM / time
+            for length, count, time in zip(length_pool, count_pool, duration)
+        ]
+
+    @classmethod
+    def get_batch_spent_calories(cls, speed: list[float],
+                                 duration: list[float],
+                                 weight: list[float],
+                                 length_pool: list[float],
+                                 count_pool: list[int]) -> list[float]:
+        """Получить затраченные калории для пачки тренировок."""
+        addition, multiplier = cls.coefficients
+        return [
+            (mean_speed + addition) * multiplier * mass * time
+            for mean_speed, time, mass in zip(speed, duration, weight)
+        ]
+
+
+METRICS_CACHE = '_metrics'
+
+
+def memoized_metric(method: Callable[[Training], float]
+                    ) -> Callable[[Training], float]:
+    """Кэшировать метрику до изменения полей или коэффициентов."""
+    name = method.__name__
+
+    @wraps(method)
+    def get_metric(self: Training) -> float:
+        if not self.CACHE_METRICS:
+            return method(self)
+        cache = self.__dict__.get(METRICS_CACHE)
+        if cache is None or cache[0] != TrainingMeta.version:
+            cache = self.__dict__[METRICS_CACHE] = TrainingMeta.version, {}
+        metrics = cache[1]
+        if name not in metrics:
+            metrics[name] = method(self)
+        return metrics[name]
+    return get_metric
+
+
+class CachedMetrics:
+    """Примесь, кэширующая дистанцию, скорость и калории тренировки."""
+    CACHE_METRICS = True
+
+    def __setattr__(self, name: str, value: object) -> None:
+        object.__setattr__(self, name, value)
+        self.__dict__.pop(METRICS_CACHE, None)
+
+    @memoized_metric
+    def get_distance(self) -> float:
+        """Получить дистанцию в км."""
+        return super().get_distance()
+
+    @memoized_metric
+    def get_mean_speed(self) -> float:
+        """Получить среднюю скорость движения."""
+        return super().get_mean_speed()
+
+    @memoized_metric
+    def get_spent_calories(self) -> float:
+        """Получить количество затраченных калорий."""
+        return super().get_spent_calories()
 
 
 TYPES_TRANING = {
@@ -125,31 +523,769 @@ TYPES_TRANING = {
     'RUN': Running,
     'WLK': SportsWalking
 }
+VARIANT_EXCLUDED_ATTRIBUTES = frozenset(('__dict__', '__weakref__', '_fields'))
+
+
+def make_slotted(training_class: type) -> type:
+    """Создать вариант класса тренировки со __slots__ вместо __dict__.
+
+    Вариант строится тем же метаклассом и наследует слотовый вариант
+    родителя, а константы, изменённые у исходного класса, метакласс
+    переносит в вариант, поэтому коэффициенты у них совпадают.
+    """
+    if training_class is Training:
+        base = Record
+    else:
+        base = SLOTTED_TYPES[training_class.__bases__[0]]
+    namespace = {
+        name: value for name, value in vars(training_class).items()
+        if name not in VARIANT_EXCLUDED_ATTRIBUTES
+    }
+    namespace['__slots__'] = tuple(
+        name for name in namespace.get('__annotations__', {})
+        if not name.isupper()
+    )
+    return TrainingMeta(training_class.__name__, (base,), namespace)
+
+
+def make_cached(training_class: type) -> type:
+    """Создать вариант класса тренировки с кэшированием метрик."""
+    return type(
+        training_class.__name__,
+        (CachedMetrics, training_class),
+        {'__doc__': training_class.__doc__}
+    )
+
+
+class WorkoutType(Record):
+    """Зарегистрированный тип тренировки с заранее вычисленной схемой."""
+    code: str
+    training_class: type
+    field_names: tuple[str, ...]
+    arity: int
+    constructor: Callable[..., Training]
+
+
+class VariantTypes(dict):
+    """Варианты классов тренировок, создаваемые при первом обращении."""
+
+    def __init__(self, make_variant: Callable[[type], type]) -> None:
+        super().__init__()
+        self.make_variant = make_variant
+
+    def __missing__(self, training_class: type) -> type:
+        variant = self[training_class] = self.make_variant(training_class)
+        return variant
+
+
+SLOTTED_TYPES = VariantTypes(make_slotted)
+CACHED_TYPES = VariantTypes(make_cached)
+WORKOUT_TYPES: dict[str, WorkoutType] = {}
+
+
+def register_workout_type(code: str, training_class: type) -> WorkoutType:
+    """Зарегистрировать тип тренировки под кодом пакета."""
+    field_names = get_field_names(training_class)
+    workout = WorkoutType(
+        code, training_class, field_names, len(field_names), training_class
+    )
+    if code in WORKOUT_TYPES:
+        TrainingMeta.version += 1
+    WORKOUT_TYPES[code] = workout
+    TYPES_TRANING[code] = training_class
+    return workout
+
+
 PHRASE_TYPE_ERROR = (
     'Неверный тип тренировки: {}. '
 )
 PHRASE_COUNT_PARAMETRS_ERROR = 'неверное число переданных параметров для {}'
+PHRASE_BATCH_LENGTH_ERROR = 'колонки пачки {} должны быть одной длины'
+PACKAGE_FORMATS = ('csv', 'jsonl')
+CHUNK_SIZE = 1000
+CHUNK_BYTES = 4 * 1024 * 1024
+PHRASE_WORKERS_STDIN_ERROR = 'параллельный режим требует файл, а не stdin'
+OUTPUT_FORMATS = ('text', 'jsonl', 'csv', 'compact')
+BLOCK_BYTES = 1024 * 1024
+CSV_TEMPLATE = '%s,%r,%r,%r,%r'
+COMPACT_VALUES_TEMPLATE = ',%.3f,%.3f,%.3f,%.3f'
+COMPACT_TYPE_PREFIX = '='
+PHRASE_OUTPUT_FORMAT_ERROR = 'неизвестный формат вывода: {}'
+CACHE_SIZE = 4096
+QUEUE_SIZE = 16
+PHRASE_WORKERS_COMPRESSED_ERROR = (
+    'параллельный режим не работает со сжатыми файлами'
+)
+PHRASE_THREADS_ERROR = 'конвейеру нужен хотя бы один поток расчёта'
+PHRASE_MODE_OPTION_ERROR = 'параметр {} не работает вместе с {}'
+REPORT_OPTIONS = ('block_size', 'cache_size', 'render_cache')
+MODE_OPTIONS = ('workers', 'threads', 'expand')
+
+
+def read_cached_package(workout_type: str, data: list[float]) -> Training:
+    """Прочитать пакет в тренировку с кэшированием метрик."""
+    training_class = get_workout_type(workout_type, len(data)).training_class
+    return CACHED_TYPES[training_class](*data)
+
+
+def get_workout_types() -> dict[str, WorkoutType]:
+    """Получить типы в порядке TYPES_TRANING, регистрируя недостающие."""
+    return {
+        code: (
+            WORKOUT_TYPES.get(code)
+            or register_workout_type(code, training_class)
+        )
+        for code, training_class in list(TYPES_TRANING.items())
+    }
+
+
+def get_workout_type(workout_type: str, count: int) -> WorkoutType:
+    """Найти тип тренировки по коду и проверить число параметров."""
+    workout = WORKOUT_TYPES.get(workout_type)
+    if workout is None:
+        if workout_type not in TYPES_TRANING:
+            raise ValueError(PHRASE_TYPE_ERROR.format(workout_type))
+        workout = register_workout_type(
+            workout_type, TYPES_TRANING[workout_type]
+        )
+    if count != workout.arity:
+        raise Exception(PHRASE_COUNT_PARAMETRS_ERROR.format(workout_type))
+    return workout
 
 
 def read_package(workout_type: str, data: list[float]) -> Training:
     """Прочитать данные полученные от датчиков."""
-    if workout_type in TYPES_TRANING:
-        if len(data) != len(fields(TYPES_TRANING[workout_type])):
-            raise Exception(PHRASE_COUNT_PARAMETRS_ERROR.format(workout_type))
-        return TYPES_TRANING[workout_type](*data)
-    raise ValueError(PHRASE_TYPE_ERROR.format(workout_type))
+    workout = get_workout_type(workout_type, len(data))
+    if INSTRUMENTATION is None:
+        return workout.constructor(*data)
+    return INSTRUMENTATION.measure(
+        'read_package', workout.training_class.__name__,
+        workout.constructor, *data
+    )
 
 
-def main(training: Training) -> None:
-    print(training.show_training_info().get_message())
+class TrainingTable:
+    """Тренировки одного типа, хранящиеся по колонкам в массивах."""
 
+    def __init__(self, training_class: type) -> None:
+        self.training_class = training_class
+        self.columns = tuple(
+            array('d') for _ in get_field_names(training_class)
+        )
 
-if __name__ == '__main__':
-    packages = [
-        ('SWM', [720, 1, 80, 25, 40]),
-        ('RUN', [15000, 1, 75]),
-        ('WLK', [9000, 1, 75, 180]),
-    ]
+    def __repr__(self) -> str:
+        return f'TrainingTable(training_class={self.training_class!r})'
+
+    def __len__(self) -> int:
+        return len(self.columns[0])
+
+    def __getitem__(self, index: int) -> Training:
+        return SLOTTED_TYPES[self.training_class](
+            *(column[index] for column in self.columns)
+        )
 
+    def __iter__(self) -> Iterator[Training]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def append(self, data: list[float]) -> None:
+        """Добавить тренировку в таблицу."""
+        if len(data) != len(self.columns):
+            raise Exception(
+                PHRASE_COUNT_PARAMETRS_ERROR.format(
+                    self.training_class.__name__
+                )
+            )
+        for column, value in zip(self.columns, data):
+            column.append(value)
+
+    def extend(self, rows: Iterable[list[float]]) -> None:
+        """Добавить несколько тренировок в таблицу."""
+        for data in rows:
+            self.append(data)
+
+    def calculate(self) -> BatchResult:
+        """Рассчитать все тренировки таблицы одной пачкой."""
+        return self.training_class.calculate_batch(*self.columns)
+
+
+def calculate_packages(
+    packages: list[tuple[str, list[float]]]
+) -> dict[str, BatchResult]:
+    """Рассчитать пакеты разных типов тренировок пачками по коду."""
+    groups: dict[str, tuple[list[int], list[list[float]]]] = {}
+    for position, (workout_type, data) in enumerate(packages):
+        get_workout_type(workout_type, len(data))
+        positions, rows = groups.setdefault(workout_type, ([], []))
+        positions.append(position)
+        rows.append(data)
+    results = {}
+    for workout_type, (positions, rows) in groups.items():
+        training_class = WORKOUT_TYPES[workout_type].training_class
+        result = training_class.calculate_batch(*zip(*rows))
+        result.positions = positions
+        results[workout_type] = result
+    return results
+
+
+class ParseStats(Record):
+    """Счётчики разобранных и пропущенных строк."""
+    lines: int = 0
+    malformed: int = 0
+
+
+class PacketParser:
+    """Разбор сырых строк `CODE,v1,v2,...` по схеме типов тренировок.
+
+    Число значений берётся из полей класса тренировки; строки с
+    неизвестным кодом, неверным числом значений или не числами
+    пропускаются и учитываются в `stats.malformed`.
+    """
+
+    def __init__(self) -> None:
+        self.stats = ParseStats()
+
+    def iter_rows(self, lines: Iterable[bytes]
+                  ) -> Iterator[tuple[WorkoutType, list[float]]]:
+        """Получить тип тренировки и значения для каждой верной строки."""
+        schema = {
+            code.encode('ascii'): workout
+            for code, workout in get_workout_types().items()
+        }
+        stats = self.stats
+        for line in lines:
+            if not line.strip():
+                continue
+            stats.lines += 1
+            code, _, rest = line.partition(b',')
+            code = code.strip()
+            workout = schema.get(code)
+            values = rest.split(b',')
+            if workout is None or len(values) != workout.arity:
+                stats.malformed += 1
+                continue
+            try:
+                data = [float(value) for value in values]
+            except ValueError:
+                stats.malformed += 1
+                continue
+            yield workout, data
+
+    def iter_trainings(self, lines: Iterable[bytes]) -> Iterator[Training]:
+        """Получить тренировки из верных строк."""
+        for workout, data in self.iter_rows(lines):
+            yield workout.constructor(*data)
+
+    def parse_tables(self,
+                     lines: Iterable[bytes]) -> dict[str, TrainingTable]:
+        """Разложить верные строки по колоночным таблицам типов."""
+        tables: dict[str, TrainingTable] = {}
+        for workout, data in self.iter_rows(lines):
+            table = tables.get(workout.code)
+            if table is None:
+                table = tables[workout.code] = TrainingTable(
+                    workout.training_class
+                )
+            table.append(data)
+        return tables
+
+
+def parse_package(line: str,
+                  package_format: str = 'csv') -> tuple[str, list[float]]:
+    """Разобрать строку пакета: `CODE,v1,v2,...` или JSON."""
+    if package_format == 'jsonl':
+        import json
+        package = json.loads(line)
+        if isinstance(package, dict):
+            package = package['workout_type'], package['data']
+        workout_type, data = package
+    else:
+        workout_type, *data = line.split(',')
+    return workout_type.strip(), [float(value) for value in data]
+
+
+def iter_packages(stream: Iterable[str],
+                  package_format: str = 'csv'
+                  ) -> Iterator[tuple[str, list[float]]]:
+    """Лениво читать пакеты из потока строк."""
+    for line in stream:
+        if line.strip():
+            yield parse_package(line, package_format)
+
+
+class CacheStats(Record):
+    """Статистика обращений к кэшу пакетов."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class PackageCache:
+    """LRU-кэш сообщений по содержимому пакета.
+
+    Ключ — значения пакета и их типы, как в кэше строк ReportWriter:
+    сообщение хранит значения в переданных типах, поэтому пакеты с 1 и
+    1.0 выводятся по-разному. Пакеты с нулями считаются без кэша.
+    Кэш сбрасывается, если изменился коэффициент любого класса тренировки
+    или зарегистрирован тип. Сообщения из кэша общие для всех обращений,
+    изменять их нельзя.
+    """
+
+    def __init__(self, maxsize: int = CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self.entries: OrderedDict[tuple, InfoMessage] = OrderedDict()
+        self.stats = CacheStats()
+        self.version = TrainingMeta.version
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get_info(self, workout_type: str, data: list[float]) -> InfoMessage:
+        """Получить сообщение о тренировке из кэша или рассчитать его."""
+        if self.version != TrainingMeta.version:
+            self.clear()
+        if 0.0 in data:
+            return read_package(workout_type, data).show_training_info()
+        key = workout_type, tuple(data), tuple(map(type, data))
+        message = self.entries.get(key)
+        if message is not None:
+            self.stats.hits += 1
+            self.entries.move_to_end(key)
+            return message
+        self.stats.misses += 1
+        message = read_package(workout_type, data).show_training_info()
+        self.entries[key] = message
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.stats.evictions += 1
+        return message
+
+    def clear(self) -> None:
+        """Очистить кэш."""
+        self.entries.clear()
+        self.version = TrainingMeta.version
+
+
+def iter_messages(
+    packages: Iterable[tuple[str, list[float]]],
+    cache: PackageCache | None = None
+) -> Iterator[InfoMessage]:
+    """Лениво рассчитывать информационные сообщения для пакетов."""
+    if cache is not None:
+        for workout_type, data in packages:
+            yield cache.get_info(workout_type, data)
+        return
     for workout_type, data in packages:
-        main(read_package(workout_type, data))
+        yield read_package(workout_type, data).show_training_info()
+
+
+def render_rows(rows: Iterable[tuple], output: TextIOBase,
+                chunk_size: int = CHUNK_SIZE) -> int:
+    """Записать строки MESSAGE по значениям полей, вернуть их количество."""
+    template = InfoMessage.MESSAGE_TEMPLATE
+    rows = iter(rows)
+    count = 0
+    while chunk := list(islice(rows, chunk_size)):
+        output.write('\n'.join([template % row for row in chunk]) + '\n')
+        count += len(chunk)
+    return count
+
+
+def render_many(messages: Iterable[InfoMessage], output: TextIOBase,
+                chunk_size: int = CHUNK_SIZE) -> int:
+    """Записать сообщения в поток блоками, вернуть их количество."""
+    return render_rows(map(get_message_row, messages), output, chunk_size)
+
+
+def get_type_codes() -> dict[str, str]:
+    """Получить коды пакетов по именам классов тренировок."""
+    return {
+        workout.training_class.__name__: code
+        for code, workout in get_workout_types().items()
+    }
+
+
+def get_report_header(output_format: str) -> str:
+    """Получить заголовок отчёта: имена колонок CSV или словарь типов."""
+    if output_format == 'csv':
+        return ','.join(MESSAGE_FIELDS) + '\n'
+    if output_format == 'compact':
+        return ''.join(
+            f'{COMPACT_TYPE_PREFIX}{code},{name}\n'
+            for name, code in get_type_codes().items()
+        )
+    return ''
+
+
+def expand_compact(lines: Iterable[str]) -> Iterator[str]:
+    """Развернуть компактный отчёт в строки MESSAGE без пересчёта.
+
+    Числа компактного отчёта уже округлены как в MESSAGE, поэтому
+    подставляются строками.
+    """
+    template = InfoMessage.EXPANDED_TEMPLATE
+    names: dict[str, str] = {}
+    for line in lines:
+        line = line.rstrip('\n')
+        if line.startswith(COMPACT_TYPE_PREFIX):
+            code, name = line[len(COMPACT_TYPE_PREFIX):].split(',')
+            names[code] = sys.intern(name)
+        elif line:
+            code, *values = line.split(',')
+            yield template % (names.get(code, code), *values)
+
+
+class ReportWriter:
+    """Буферизованная запись отчётов блоками в поток или дескриптор.
+
+    При `cache_size` готовые строки запоминаются по значениям полей
+    и их типам: повторяющиеся результаты не форматируются заново, а
+    равные значения разных типов, вроде 1 и 1.0, не смешиваются.
+    Строки с нулями форматируются без кэша, потому что 0.0 и -0.0
+    равны, но печатаются по-разному. Кэш очищается целиком, когда в
+    нём `cache_size` строк.
+    """
+
+    def __init__(self, output: TextIOBase | int,
+                 output_format: str = 'text',
+                 block_size: int = BLOCK_BYTES,
+                 header: bool = True,
+                 cache_size: int = 0) -> None:
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(PHRASE_OUTPUT_FORMAT_ERROR.format(output_format))
+        if output_format == 'jsonl':
+            import json
+            self.dumps = json.dumps
+        if output_format == 'compact':
+            self.templates = {
+                name: code + COMPACT_VALUES_TEMPLATE
+                for name, code in get_type_codes().items()
+            }
+        self.output = output
+        self.block_size = block_size
+        self.format_row = getattr(self, f'format_{output_format}')
+        self.cache_size = cache_size
+        self.lines: dict[tuple[tuple, tuple], str] = {}
+        if cache_size:
+            self.format_uncached = self.format_row
+            self.format_row = self.format_cached
+        self.chunks: list[str] = []
+        self.size = 0
+        self.count = 0
+        if header:
+            self.chunks.append(get_report_header(output_format))
+
+    def __enter__(self) -> 'ReportWriter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.flush()
+
+    def format_text(self, row: tuple) -> str:
+        return InfoMessage.MESSAGE_TEMPLATE % row
+
+    def format_jsonl(self, row: tuple) -> str:
+        return self.dumps(dict(zip(MESSAGE_FIELDS, row)), ensure_ascii=False)
+
+    def format_csv(self, row: tuple) -> str:
+        return CSV_TEMPLATE % row
+
+    def format_compact(self, row: tuple) -> str:
+        template = self.templates.get(row[0])
+        if template is None:
+            template = self.templates[row[0]] = (
+                row[0] + COMPACT_VALUES_TEMPLATE
+            )
+        return template % row[1:]
+
+    def format_cached(self, row: tuple) -> str:
+        if 0.0 in row:
+            return self.format_uncached(row)
+        key = row, tuple(map(type, row))
+        line = self.lines.get(key)
+        if line is None:
+            if len(self.lines) >= self.cache_size:
+                self.lines.clear()
+            line = self.lines[key] = self.format_uncached(row)
+        return line
+
+    def write_rows(self, rows: Iterable[tuple]) -> None:
+        """Добавить строки отчёта по значениям полей сообщений."""
+        format_row = self.format_row
+        for row in rows:
+            line = format_row(row) + '\n'
+            self.chunks.append(line)
+            self.size += len(line)
+            self.count += 1
+            if self.size >= self.block_size:
+                self.flush()
+
+    def write_messages(self, messages: Iterable[InfoMessage]) -> None:
+        """Добавить строки отчёта для информационных сообщений."""
+        self.write_rows(map(get_message_row, messages))
+
+    def write_trainings(self, trainings: Iterable[Training]) -> None:
+        """Рассчитать тренировки и добавить строки отчёта."""
+        self.write_messages(
+            training.show_training_info() for training in trainings
+        )
+
+    def flush(self) -> None:
+        """Записать накопленный блок."""
+        data = ''.join(self.chunks)
+        self.chunks.clear()
+        self.size = 0
+        if not isinstance(self.output, int):
+            self.output.write(data)
+            return
+        view = memoryview(data.encode('utf-8'))
+        while view:
+            view = view[os.write(self.output, view):]
+
+
+def iter_byte_ranges(path: str,
+                     chunk_bytes: int = CHUNK_BYTES
+                     ) -> Iterator[tuple[int, int]]:
+    """Разбить файл на диапазоны байтов по границам строк."""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as file:
+        start = 0
+        while start < size:
+            file.seek(start + chunk_bytes)
+            file.readline()
+            end = min(file.tell(), size)
+            yield start, end
+            start = end
+
+
+def render_lines(lines: Iterable[str], package_format: str = 'csv',
+                 output_format: str = 'text') -> str:
+    """Рассчитать пакеты из строк и вернуть отчёт без заголовка."""
+    output = StringIO()
+    with ReportWriter(output, output_format, header=False) as writer:
+        writer.write_messages(
+            iter_messages(iter_packages(lines, package_format))
+        )
+    return output.getvalue()
+
+
+def render_byte_range(task: tuple[str, int, int, str, str]) -> str:
+    """Рассчитать и отформатировать пакеты из диапазона байтов файла."""
+    path, start, end, package_format, output_format = task
+    with open(path, 'rb') as file:
+        file.seek(start)
+        lines = file.read(end - start).decode('utf-8').splitlines()
+    return render_lines(lines, package_format, output_format)
+
+
+def run_parallel(path: str, output: TextIOBase, workers: int | None = None,
+                 package_format: str = 'csv',
+                 chunk_bytes: int = CHUNK_BYTES,
+                 output_format: str = 'text') -> int:
+    """Обработать файл в нескольких процессах, сохранив порядок строк."""
+    from multiprocessing import Pool
+    tasks = (
+        (path, start, end, package_format, output_format)
+        for start, end in iter_byte_ranges(path, chunk_bytes)
+    )
+    count = 0
+    output.write(get_report_header(output_format))
+    with Pool(workers) as pool:
+        for text in pool.imap(render_byte_range, tasks):
+            output.write(text)
+            count += text.count('\n')
+    return count
+
+
+def open_input(path: str, mode: str = 'rt') -> IOBase:
+    """Открыть файл пакетов, распаковывая gzip и bz2 по расширению.
+
+    В режиме 'rb' возвращается поток байтов, для '-' это буфер stdin.
+    """
+    binary = 'b' in mode
+    encoding = None if binary else 'utf-8'
+    if path == '-':
+        return sys.stdin.buffer if binary else sys.stdin
+    if path.endswith('.gz'):
+        import gzip
+        return gzip.open(path, mode, encoding=encoding)
+    if path.endswith('.bz2'):
+        import bz2
+        return bz2.open(path, mode, encoding=encoding)
+    return open(path, mode, encoding=encoding)
+
+
+def run_threaded(path: str, output: TextIOBase, workers: int = 2,
+                 package_format: str = 'csv',
+                 output_format: str = 'text',
+                 batch_size: int = CHUNK_SIZE,
+                 queue_size: int = QUEUE_SIZE) -> int:
+    """Обработать файл конвейером потоков: чтение, расчёт и запись.
+
+    Чтение и распаковка идут в вызывающем потоке, пачки строк
+    рассчитываются в пуле, запись выполняет отдельный поток пула в
+    порядке чтения. Очередь ограничена `queue_size` пачками. После
+    первой ошибки расчёта чтение останавливается, а пачки из очереди
+    отменяются.
+    """
+    if workers < 1:
+        raise ValueError(PHRASE_THREADS_ERROR)
+    from concurrent.futures import Future, ThreadPoolExecutor
+    from queue import Queue
+    from threading import Event
+    results: Queue[Future | None] = Queue(queue_size)
+    failed = Event()
+
+    def write() -> int:
+        count = 0
+        error = None
+        while (future := results.get()) is not None:
+            if error is not None:
+                future.cancel()
+                continue
+            try:
+                text = future.result()
+            except Exception as exception:
+                error = exception
+                failed.set()
+                continue
+            output.write(text)
+            count += text.count('\n')
+        if error is not None:
+            raise error
+        return count
+
+    output.write(get_report_header(output_format))
+    with ThreadPoolExecutor(workers + 1) as executor:
+        writer = executor.submit(write)
+        try:
+            with open_input(path) as stream:
+                while not failed.is_set() and (
+                    lines := list(islice(stream, batch_size))
+                ):
+                    results.put(executor.submit(
+                        render_lines, lines, package_format, output_format
+                    ))
+        finally:
+            results.put(None)
+        return writer.result()
+
+
+def main(training: Training) -> None:
+    if INSTRUMENTATION is None:
+        print(training.show_training_info().get_message())
+        return
+    INSTRUMENTATION.measure(
+        'main', type(training).__name__,
+        lambda: print(training.show_training_info().get_message())
+    )
+
+
+def main_many(trainings: Iterable[Training],
+              output: TextIOBase | int | None = None,
+              output_format: str = 'text',
+              block_size: int = BLOCK_BYTES) -> int:
+    """Вывести отчёты о многих тренировках блоками, вернуть их число."""
+    if output is None:
+        output = sys.stdout
+    with ReportWriter(output, output_format, block_size) as writer:
+        writer.write_trainings(trainings)
+    return writer.count
+
+
+def check_mode_options(parser, args) -> None:
+    """Отклонить параметры обычного отчёта в режимах, где они не работают."""
+    for mode in MODE_OPTIONS:
+        if parser.get_default(mode) == getattr(args, mode):
+            continue
+        for option in REPORT_OPTIONS:
+            if parser.get_default(option) != getattr(args, option):
+                parser.error(PHRASE_MODE_OPTION_ERROR.format(
+                    '--' + option.replace('_', '-'), '--' + mode
+                ))
+
+
+def run(argv: list[str] | None = None) -> None:
+    """Обработать пакеты из файла или stdin и вывести результаты."""
+    import argparse
+    parser = argparse.ArgumentParser(description='Модуль фитнес-трекера.')
+    parser.add_argument(
+        'path', nargs='?',
+        help='файл с пакетами, `-` для чтения из stdin'
+    )
+    parser.add_argument('--format', choices=PACKAGE_FORMATS, default='csv')
+    parser.add_argument(
+        '--output-format', choices=OUTPUT_FORMATS, default='text'
+    )
+    parser.add_argument('--block-size', type=int, default=BLOCK_BYTES)
+    parser.add_argument(
+        '--cache-size', type=int,
+        help='размер LRU-кэша результатов для повторяющихся пакетов'
+    )
+    parser.add_argument(
+        '--render-cache', type=int, default=0,
+        help='число запоминаемых строк отчёта для повторяющихся результатов'
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        '--workers', type=int,
+        help='число процессов для параллельной обработки файла'
+    )
+    mode.add_argument(
+        '--threads', type=int,
+        help='число потоков расчёта в конвейере чтение-расчёт-запись'
+    )
+    mode.add_argument(
+        '--expand', action='store_true',
+        help='развернуть компактный отчёт из файла в полный текст'
+    )
+    args = parser.parse_args(argv)
+    check_mode_options(parser, args)
+    if args.path is None:
+        packages = [
+            ('SWM', [720, 1, 80, 25, 40]),
+            ('RUN', [15000, 1, 75]),
+            ('WLK', [9000, 1, 75, 180]),
+        ]
+        for workout_type, data in packages:
+            main(read_package(workout_type, data))
+        return
+    if args.workers is not None:
+        if args.path == '-':
+            parser.error(PHRASE_WORKERS_STDIN_ERROR)
+        if args.path.endswith(('.gz', '.bz2')):
+            parser.error(PHRASE_WORKERS_COMPRESSED_ERROR)
+        run_parallel(
+            args.path, sys.stdout, args.workers, args.format,
+            output_format=args.output_format
+        )
+        return
+    if args.threads is not None:
+        if args.threads < 1:
+            parser.error(PHRASE_THREADS_ERROR)
+        run_threaded(
+            args.path, sys.stdout, args.threads, args.format,
+            args.output_format
+        )
+        return
+    if args.expand:
+        with open_input(args.path) as stream:
+            sys.stdout.writelines(
+                line + '\n' for line in expand_compact(stream)
+            )
+        return
+    cache = None
+    if args.cache_size:
+        cache = PackageCache(args.cache_size)
+    with open_input(args.path) as stream:
+        with ReportWriter(
+            sys.stdout, args.output_format, args.block_size,
+            cache_size=args.render_cache
+        ) as writer:
+            writer.write_messages(iter_messages(
+                iter_packages(stream, args.format), cache
+            ))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,146 @@
+import json
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Optional, Protocol
+
+import homework
+
+BUCKETS = tuple(2 ** power / 1_000_000 for power in range(21))
+PHRASE_SAMPLE_ERROR = 'sample_every должен быть не меньше 1, передано {}'
+
+
+@dataclass
+class Histogram:
+    """Гистограмма задержек со степенными корзинами от 1 мкс до 1 с."""
+    count: int = 0
+    total: float = 0.0
+    maximum: float = 0.0
+    buckets: list[int] = field(
+        default_factory=lambda: [0] * (len(BUCKETS) + 1)
+    )
+
+    def add(self, seconds: float) -> None:
+        """Учесть одну задержку."""
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+
+    def get_percentile(self, fraction: float) -> float:
+        """Получить верхнюю границу корзины, содержащей перцентиль."""
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.maximum
+
+
+class Sink(Protocol):
+    def write(self, snapshot: dict) -> None:
+        ...
+
+
+class MemorySink:
+    """Приёмник, хранящий снимки в памяти."""
+
+    def __init__(self) -> None:
+        self.snapshots: list[dict] = []
+
+    def write(self, snapshot: dict) -> None:
+        self.snapshots.append(snapshot)
+
+
+class FileSink:
+    """Приёмник, дописывающий снимки в файл строками JSON."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def write(self, snapshot: dict) -> None:
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(snapshot, ensure_ascii=False) + '\n')
+
+
+class Instrumentation:
+    """Счётчики и задержки этапов обработки по типам тренировок.
+
+    Задержка замеряется у первого и затем у каждого `sample_every`-го
+    вызова этапа отдельно для каждого типа, счётчики учитывают все
+    вызовы. При заданном `interval` снимок отправляется
+    в приёмник не чаще раза в `interval` секунд.
+    """
+
+    def __init__(self, sink: Optional[Sink] = None, sample_every: int = 1,
+                 interval: Optional[float] = None) -> None:
+        if sample_every < 1:
+            raise ValueError(PHRASE_SAMPLE_ERROR.format(sample_every))
+        self.sink = sink
+        self.sample_every = sample_every
+        self.interval = interval
+        self.counters: defaultdict[tuple[str, str], int] = defaultdict(int)
+        self.histograms: dict[tuple[str, str], Histogram] = {}
+        self.last_flush = time.monotonic()
+
+    def measure(self, stage: str, key: str,
+                function: Callable, *args) -> object:
+        """Вызвать функцию, учитывая вызов и, выборочно, его задержку."""
+        calls = self.counters[stage, key]
+        self.counters[stage, key] = calls + 1
+        if calls % self.sample_every:
+            return function(*args)
+        start = time.perf_counter()
+        result = function(*args)
+        self.record(stage, key, time.perf_counter() - start)
+        return result
+
+    def record(self, stage: str, key: str, seconds: float) -> None:
+        """Учесть задержку этапа."""
+        histogram = self.histograms.get((stage, key))
+        if histogram is None:
+            histogram = self.histograms[stage, key] = Histogram()
+        histogram.add(seconds)
+        if (
+            self.interval is not None
+            and time.monotonic() - self.last_flush >= self.interval
+        ):
+            self.flush()
+
+    def snapshot(self) -> dict:
+        """Получить счётчики и гистограммы по этапам и типам."""
+        stages: dict[str, dict] = {}
+        for (stage, key), calls in self.counters.items():
+            histogram = self.histograms.get((stage, key), Histogram())
+            stages.setdefault(stage, {})[key] = {
+                'calls': calls, **asdict(histogram)
+            }
+        return {
+            'time': time.time(),
+            'sample_every': self.sample_every,
+            'stages': stages,
+        }
+
+    def flush(self) -> None:
+        """Отправить снимок в приёмник."""
+        self.last_flush = time.monotonic()
+        if self.sink is not None:
+            self.sink.write(self.snapshot())
+
+
+def enable(instrumentation: Optional[Instrumentation] = None
+           ) -> Instrumentation:
+    """Включить замеры в homework.py."""
+    homework.INSTRUMENTATION = instrumentation or Instrumentation()
+    return homework.INSTRUMENTATION
+
+
+def disable() -> Optional[Instrumentation]:
+    """Выключить замеры, отправив последний снимок в приёмник."""
+    instrumentation = homework.INSTRUMENTATION
+    homework.INSTRUMENTATION = None
+    if instrumentation is not None:
+        instrumentation.flush()
+    return instrumentation
@@ -0,0 +1,301 @@
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from io import StringIO
+from typing import Iterable, Optional
+
+import benchmark
+import homework
+
+SAMPLE_INTERVAL = 0.001
+TRACE_FRAMES = 8
+TOP = 20
+SUMMARY_NAME = 'profile.json'
+FOLDED_NAME = 'stacks.folded'
+PSTATS_NAME = '{}.pstats'
+DIFF_LINE = (
+    '{type:<14} {name:<50} {before:>10.4f} {after:>10.4f} {change:>+8.1%}'
+)
+PHRASE_PROFILE_SAVED = 'Профиль сохранён в {}'
+
+Package = tuple[str, list[float]]
+
+
+def run_workload(packages: list[Package], repeat: int = 1) -> None:
+    """Прогнать пакеты через read_package, расчёт и запись отчёта."""
+    for _ in range(repeat):
+        with homework.ReportWriter(StringIO()) as writer:
+            writer.write_messages(
+                homework.read_package(workout_type, data).show_training_info()
+                for workout_type, data in packages
+            )
+
+
+def group_packages(packages: Iterable[Package]) -> dict[str, list[Package]]:
+    """Разложить пакеты по именам классов тренировок."""
+    groups: dict[str, list[Package]] = {}
+    for workout_type, data in packages:
+        name = homework.get_workout_type(
+            workout_type, len(data)
+        ).training_class.__name__
+        groups.setdefault(name, []).append((workout_type, data))
+    return groups
+
+
+def get_frame_name(filename: str, name: str) -> str:
+    """Получить имя функции без номера строки, устойчивое к правкам."""
+    if filename == '~':
+        return name
+    return f'{os.path.basename(filename)}:{name}'
+
+
+def profile_functions(packages: list[Package], repeat: int = 1,
+                      path: Optional[str] = None) -> dict[str, dict]:
+    """Собрать детерминированный профиль cProfile по функциям."""
+    profiler = cProfile.Profile()
+    profiler.runcall(run_workload, packages, repeat)
+    stats = pstats.Stats(profiler)
+    if path is not None:
+        stats.dump_stats(path)
+    functions: dict[str, dict] = {}
+    for (filename, _, name), values in stats.stats.items():
+        _, calls, tottime, cumtime, _ = values
+        summary = functions.setdefault(
+            get_frame_name(filename, name),
+            {'calls': 0, 'tottime': 0.0, 'cumtime': 0.0}
+        )
+        summary['calls'] += calls
+        summary['tottime'] += tottime
+        summary['cumtime'] += cumtime
+    return functions
+
+
+class Sampler(threading.Thread):
+    """Поток, снимающий стеки другого потока с заданным интервалом.
+
+    Стек обрезается по кадру `run_workload`, чтобы в свёрнутых стеках
+    не было кадров вызывающего кода.
+    """
+
+    def __init__(self, thread_id: int,
+                 interval: float = SAMPLE_INTERVAL) -> None:
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        root = run_workload.__code__
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(get_frame_name(code.co_filename, code.co_name))
+                if code is root:
+                    self.stacks[tuple(reversed(stack))] += 1
+                    break
+                frame = frame.f_back
+
+    def stop(self) -> Counter[tuple[str, ...]]:
+        self.stopped.set()
+        self.join()
+        return self.stacks
+
+
+def sample_stacks(packages: list[Package], repeat: int = 1,
+                  interval: float = SAMPLE_INTERVAL
+                  ) -> Counter[tuple[str, ...]]:
+    """Собрать выборочный профиль стеков во время прогона."""
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(min(switch_interval, interval))
+    sampler = Sampler(threading.get_ident(), interval)
+    sampler.start()
+    try:
+        run_workload(packages, repeat)
+    finally:
+        stacks = sampler.stop()
+        sys.setswitchinterval(switch_interval)
+    return stacks
+
+
+def trace_allocations(packages: list[Package],
+                      top: int = TOP) -> dict[str, object]:
+    """Найти строки кода, выделившие больше всего памяти за прогон.
+
+    Тренировки, сообщения и отчёт удерживаются до снимка, поэтому
+    в него попадают все выделения этапов, а не только утечки.
+    """
+    tracemalloc.start(TRACE_FRAMES)
+    try:
+        before = tracemalloc.take_snapshot()
+        trainings = [homework.read_package(*package) for package in packages]
+        messages = [training.show_training_info() for training in trainings]
+        output = StringIO()
+        with homework.ReportWriter(output) as writer:
+            writer.write_messages(messages)
+        after = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    sites = {}
+    after = after.filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)]
+    )
+    for statistic in after.compare_to(before, 'lineno')[:top]:
+        frame = statistic.traceback[0]
+        sites[f'{os.path.basename(frame.filename)}:{frame.lineno}'] = {
+            'size': statistic.size_diff,
+            'count': statistic.count_diff,
+        }
+    return {'peak': peak, 'sites': sites}
+
+
+def profile(packages: list[Package], directory: str, repeat: int = 1,
+            interval: float = SAMPLE_INTERVAL, top: int = TOP) -> dict:
+    """Снять профили по типам тренировок и сохранить их в каталог.
+
+    Каждый тип прогоняется отдельно: без замеров, под cProfile, под
+    выборочным профилировщиком и под tracemalloc, чтобы замеры не
+    искажали друг друга. Функции и стеки называются без номеров
+    строк, поэтому профили до и после правки можно сравнивать.
+    """
+    os.makedirs(directory, exist_ok=True)
+    summary: dict = {
+        'packages': len(packages), 'repeat': repeat, 'types': {}
+    }
+    folded = Counter()
+    for name, group in sorted(group_packages(packages).items()):
+        start = time.perf_counter()
+        run_workload(group, repeat)
+        seconds = time.perf_counter() - start
+        functions = profile_functions(
+            group, repeat, os.path.join(directory, PSTATS_NAME.format(name))
+        )
+        stacks = sample_stacks(group, repeat, interval)
+        for stack, count in stacks.items():
+            folded[(name, *stack)] += count
+        summary['types'][name] = {
+            'packages': len(group),
+            'seconds': seconds,
+            'samples': sum(stacks.values()),
+            'functions': functions,
+            'allocations': trace_allocations(group, top),
+        }
+    with open(os.path.join(directory, SUMMARY_NAME), 'w',
+              encoding='utf-8') as file:
+        json.dump(summary, file, ensure_ascii=False, indent=2)
+    write_folded(folded, os.path.join(directory, FOLDED_NAME))
+    return summary
+
+
+def write_folded(stacks: Counter[tuple[str, ...]], path: str) -> None:
+    """Записать свёрнутые стеки в формате flamegraph.pl."""
+    with open(path, 'w', encoding='utf-8') as file:
+        for stack, count in sorted(stacks.items()):
+            file.write(f'{";".join(stack)} {count}\n')
+
+
+def read_folded(path: str) -> Counter[str]:
+    """Прочитать свёрнутые стеки."""
+    stacks: Counter[str] = Counter()
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            stacks[stack] += int(count)
+    return stacks
+
+
+def diff_profiles(before: dict, after: dict, key: str = 'tottime',
+                  top: int = TOP) -> list[tuple[str, str, float, float]]:
+    """Сравнить функции двух профилей, крупнейшие изменения первыми."""
+    changes = []
+    for name in sorted(before['types'].keys() | after['types'].keys()):
+        old = before['types'].get(name, {}).get('functions', {})
+        new = after['types'].get(name, {}).get('functions', {})
+        for function in old.keys() | new.keys():
+            changes.append((
+                name, function,
+                old.get(function, {}).get(key, 0.0),
+                new.get(function, {}).get(key, 0.0),
+            ))
+    changes.sort(key=lambda change: abs(change[3] - change[2]), reverse=True)
+    return changes[:top]
+
+
+def write_folded_diff(before: str, after: str, path: str) -> None:
+    """Записать свёрнутые стеки двух прогонов для difffolded."""
+    old, new = read_folded(before), read_folded(after)
+    with open(path, 'w', encoding='utf-8') as file:
+        for stack in sorted(old.keys() | new.keys()):
+            file.write(f'{stack} {old[stack]} {new[stack]}\n')
+
+
+def load_packages(source: Optional[str], count: int,
+                  package_format: str = 'csv') -> list[Package]:
+    """Загрузить пакеты из файла или сгенерировать синтетические."""
+    if source is None:
+        return benchmark.generate_packages(count)
+    with homework.open_input(source) as stream:
+        return list(homework.iter_packages(stream, package_format))
+
+
+def run(argv: Optional[list[str]] = None) -> None:
+    """Снять профили прогона или сравнить два сохранённых профиля."""
+    parser = argparse.ArgumentParser(description='Профилирование homework.py.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    record = commands.add_parser('record')
+    record.add_argument('directory')
+    record.add_argument('--input', help='файл пакетов вместо синтетических')
+    record.add_argument(
+        '--format', choices=homework.PACKAGE_FORMATS, default='csv'
+    )
+    record.add_argument('--count', type=int, default=benchmark.PACKAGE_COUNT)
+    record.add_argument('--repeat', type=int, default=1)
+    record.add_argument('--interval', type=float, default=SAMPLE_INTERVAL)
+    diff = commands.add_parser('diff')
+    diff.add_argument('before')
+    diff.add_argument('after')
+    diff.add_argument('--key', choices=('tottime', 'cumtime', 'calls'),
+                      default='tottime')
+    diff.add_argument('--folded', help='файл для стеков обоих прогонов')
+    for command in (record, diff):
+        command.add_argument('--top', type=int, default=TOP)
+    args = parser.parse_args(argv)
+    if args.command == 'record':
+        profile(
+            load_packages(args.input, args.count, args.format),
+            args.directory, args.repeat, args.interval, args.top
+        )
+        print(PHRASE_PROFILE_SAVED.format(args.directory))
+        return
+    summaries = []
+    for directory in (args.before, args.after):
+        with open(os.path.join(directory, SUMMARY_NAME),
+                  encoding='utf-8') as file:
+            summaries.append(json.load(file))
+    for name, function, before, after in diff_profiles(
+        *summaries, args.key, args.top
+    ):
+        print(DIFF_LINE.format(
+            type=name, name=function, before=before, after=after,
+            change=(after - before) / before if before else 0.0
+        ))
+    if args.folded is not None:
+        write_folded_diff(
+            os.path.join(args.before, FOLDED_NAME),
+            os.path.join(args.after, FOLDED_NAME),
+            args.folded
+        )
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,283 @@
+import argparse
+import heapq
+import json
+import math
+import os
+import sys
+import zlib
+from dataclasses import asdict, dataclass, field
+from itertools import islice
+from math import inf
+from typing import Iterable, Iterator, Optional, TextIO
+
+import aggregation
+import homework
+
+KEY_SEPARATOR = '\t'
+PART_NAME = 'part-{shard:05d}-of-{shards:05d}'
+PHRASE_SHARD_ERROR = 'номер шарда {} вне диапазона 0..{}'
+PHRASE_MISSING_SHARD_ERROR = 'нет результата шарда {} в {}'
+
+
+def add_exact(partials: list[float], value: float) -> None:
+    """Добавить число к точной сумме, хранимой неперекрывающимися частями."""
+    index = 0
+    for partial in partials:
+        if abs(value) < abs(partial):
+            value, partial = partial, value
+        high = value + partial
+        low = partial - (high - value)
+        if low:
+            partials[index] = low
+            index += 1
+        value = high
+    partials[index:] = [value]
+
+
+@dataclass
+class PartialStats:
+    """Сводка шарда, объединяемая без потери точности сумм.
+
+    Суммы хранятся частями точной суммы, поэтому результат слияния
+    не зависит от разбиения на шарды и порядка их объединения.
+    """
+    count: int = 0
+    duration: list[float] = field(default_factory=list)
+    distance: list[float] = field(default_factory=list)
+    calories: list[float] = field(default_factory=list)
+    speed_min: float = inf
+    speed_max: float = -inf
+    calories_min: float = inf
+    calories_max: float = -inf
+
+    def add(self, message: homework.InfoMessage) -> None:
+        """Учесть одну тренировку."""
+        self.count += 1
+        add_exact(self.duration, message.duration)
+        add_exact(self.distance, message.distance)
+        add_exact(self.calories, message.calories)
+        self.speed_min = min(self.speed_min, message.speed)
+        self.speed_max = max(self.speed_max, message.speed)
+        self.calories_min = min(self.calories_min, message.calories)
+        self.calories_max = max(self.calories_max, message.calories)
+
+    def merge(self, other: 'PartialStats') -> None:
+        """Добавить показатели сводки другого шарда."""
+        self.count += other.count
+        for partials, values in (
+            (self.duration, other.duration),
+            (self.distance, other.distance),
+            (self.calories, other.calories),
+        ):
+            for value in values:
+                add_exact(partials, value)
+        self.speed_min = min(self.speed_min, other.speed_min)
+        self.speed_max = max(self.speed_max, other.speed_max)
+        self.calories_min = min(self.calories_min, other.calories_min)
+        self.calories_max = max(self.calories_max, other.calories_max)
+
+    def get_stats(self) -> aggregation.Stats:
+        """Получить итоговую сводку с округлёнными суммами."""
+        return aggregation.Stats(
+            self.count,
+            math.fsum(self.duration),
+            math.fsum(self.distance),
+            math.fsum(self.calories),
+            self.speed_min,
+            self.speed_max,
+            self.calories_min,
+            self.calories_max,
+        )
+
+
+def split_key(line: str) -> tuple[str, str]:
+    """Отделить ключ `user<TAB>` от пакета; без ключа ключом служит пакет."""
+    key, separator, package = line.partition(KEY_SEPARATOR)
+    if not separator:
+        return line.strip(), line
+    return key.strip(), package
+
+
+def get_shard(key: str, shards: int) -> int:
+    """Получить номер шарда ключа, одинаковый на всех машинах."""
+    return zlib.crc32(key.encode('utf-8')) % shards
+
+
+def get_part_path(directory: str, shard: int, shards: int) -> str:
+    """Получить путь к результатам шарда без расширения."""
+    return os.path.join(
+        directory, PART_NAME.format(shard=shard, shards=shards)
+    )
+
+
+def summarize(messages: Iterable[homework.InfoMessage],
+              totals: Optional[dict[str, PartialStats]] = None
+              ) -> dict[str, PartialStats]:
+    """Собрать сводки сообщений по типам, дополнив `totals`, если заданы."""
+    if totals is None:
+        totals = {}
+    for message in messages:
+        stats = totals.get(message.training_type)
+        if stats is None:
+            stats = totals[message.training_type] = PartialStats()
+        stats.add(message)
+    return totals
+
+
+def iter_shard(stream: Iterable[str], shard: int, shards: int,
+               package_format: str = 'csv'
+               ) -> Iterator[tuple[int, homework.InfoMessage]]:
+    """Рассчитать пакеты шарда с номерами их строк во входе."""
+    for index, line in enumerate(stream):
+        key, package = split_key(line)
+        if package.strip() and get_shard(key, shards) == shard:
+            yield index, homework.read_package(
+                *homework.parse_package(package, package_format)
+            ).show_training_info()
+
+
+def run_shard(path: str, directory: str, shard: int, shards: int,
+              package_format: str = 'csv',
+              output_format: str = 'text') -> int:
+    """Обработать шард входа и записать частичные результаты в каталог.
+
+    Строки отчёта пишутся в `.lines` с номером строки входа, сводки
+    по типам — в `.json`. Оба файла появляются атомарно, `.json`
+    последним, поэтому его наличие означает готовность шарда.
+    """
+    if not 0 <= shard < shards:
+        raise ValueError(PHRASE_SHARD_ERROR.format(shard, shards - 1))
+    part = get_part_path(directory, shard, shards)
+    totals: dict[str, PartialStats] = {}
+    count = 0
+    with homework.open_input(path) as stream:
+        with open(part + '.lines.tmp', 'w', encoding='utf-8') as output:
+            format_row = homework.ReportWriter(
+                output, output_format, header=False
+            ).format_row
+            results = iter_shard(stream, shard, shards, package_format)
+            while chunk := list(islice(results, homework.CHUNK_SIZE)):
+                summarize((message for _, message in chunk), totals)
+                output.write(''.join(
+                    f'{index}{KEY_SEPARATOR}'
+                    f'{format_row(homework.get_message_row(message))}\n'
+                    for index, message in chunk
+                ))
+                count += len(chunk)
+    os.replace(part + '.lines.tmp', part + '.lines')
+    with open(part + '.json.tmp', 'w', encoding='utf-8') as file:
+        json.dump({
+            'shard': shard,
+            'shards': shards,
+            'lines': count,
+            'totals': {
+                name: asdict(stats) for name, stats in totals.items()
+            },
+        }, file)
+    os.replace(part + '.json.tmp', part + '.json')
+    return count
+
+
+def read_part_lines(path: str) -> Iterator[tuple[int, str]]:
+    """Читать строки отчёта шарда с номерами строк входа."""
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            index, _, text = line.partition(KEY_SEPARATOR)
+            yield int(index), text
+
+
+def merge_shards(directory: str, shards: int, output: TextIO,
+                 output_format: str = 'text') -> dict[str, aggregation.Stats]:
+    """Объединить результаты шардов в отчёт и сводки одного узла."""
+    totals: dict[str, PartialStats] = {}
+    for shard in range(shards):
+        part = get_part_path(directory, shard, shards)
+        try:
+            with open(part + '.json', encoding='utf-8') as file:
+                partial = json.load(file)
+        except FileNotFoundError:
+            raise ValueError(
+                PHRASE_MISSING_SHARD_ERROR.format(shard, directory)
+            ) from None
+        for name, values in partial['totals'].items():
+            totals.setdefault(name, PartialStats()).merge(
+                PartialStats(**values)
+            )
+    output.write(homework.get_report_header(output_format))
+    for _, text in heapq.merge(*(
+        read_part_lines(get_part_path(directory, shard, shards) + '.lines')
+        for shard in range(shards)
+    )):
+        output.write(text)
+    return {name: totals[name].get_stats() for name in sorted(totals)}
+
+
+def run_local(path: str, directory: str, shards: int, output: TextIO,
+              package_format: str = 'csv',
+              output_format: str = 'text') -> dict[str, aggregation.Stats]:
+    """Обработать шарды в отдельных процессах и объединить результаты."""
+    from multiprocessing import Pool
+    with Pool(shards) as pool:
+        pool.starmap(run_shard, (
+            (path, directory, shard, shards, package_format, output_format)
+            for shard in range(shards)
+        ))
+    return merge_shards(directory, shards, output, output_format)
+
+
+def write_summary(stats: dict[str, aggregation.Stats], path: str) -> None:
+    """Сохранить сводки по типам в JSON."""
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(
+            {name: asdict(values) for name, values in stats.items()},
+            file, ensure_ascii=False, indent=2
+        )
+
+
+def run(argv: Optional[list[str]] = None) -> None:
+    """Обработать шард, объединить шарды или выполнить всё локально."""
+    parser = argparse.ArgumentParser(description='Шардированный пересчёт.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    shard = commands.add_parser('shard')
+    shard.add_argument('source')
+    shard.add_argument('directory')
+    shard.add_argument('--shard', type=int, required=True)
+    local = commands.add_parser('local')
+    local.add_argument('source')
+    local.add_argument('directory')
+    merge = commands.add_parser('merge')
+    merge.add_argument('directory')
+    for command in (shard, local, merge):
+        command.add_argument('--shards', type=int, required=True)
+        command.add_argument(
+            '--output-format', choices=homework.OUTPUT_FORMATS,
+            default='text'
+        )
+    for command in (shard, local):
+        command.add_argument(
+            '--format', choices=homework.PACKAGE_FORMATS, default='csv'
+        )
+    for command in (local, merge):
+        command.add_argument('--summary', help='файл для сводок по типам')
+    args = parser.parse_args(argv)
+    if args.command == 'shard':
+        run_shard(
+            args.source, args.directory, args.shard, args.shards,
+            args.format, args.output_format
+        )
+        return
+    if args.command == 'local':
+        stats = run_local(
+            args.source, args.directory, args.shards, sys.stdout,
+            args.format, args.output_format
+        )
+    else:
+        stats = merge_shards(
+            args.directory, args.shards, sys.stdout, args.output_format
+        )
+    if args.summary is not None:
+        write_summary(stats, args.summary)
+
+
+if __name__ == '__main__':
+    run()
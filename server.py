@@ -0,0 +1,221 @@
+import argparse
+import asyncio
+import json
+import time
+from typing import Optional
+
+import batching
+import homework
+
+RESPONSE_FORMATS = ('text', 'json')
+LINE_LIMIT = 64 * 1024
+LOAD_PACKAGES = (
+    b'SWM,720,1,80,25,40',
+    b'RUN,15000,1,75',
+    b'WLK,9000,1,75,180',
+)
+PHRASE_PACKAGE_ERROR = 'Ошибка: {}'
+PHRASE_SERVING = 'Сервер принимает пакеты на {}'
+PHRASE_LOAD_REPORT = (
+    'Соединений: {connections}; пакетов: {packages}; '
+    'время: {seconds:.3f} с; {rate:,.0f} пакетов/с'
+)
+
+
+def format_response(message: Optional[homework.InfoMessage],
+                    error: Optional[Exception] = None,
+                    response_format: str = 'text') -> bytes:
+    """Сформировать ответ с сообщением о тренировке или ошибкой."""
+    if error is not None:
+        if response_format == 'json':
+            response = json.dumps({'error': str(error)}, ensure_ascii=False)
+        else:
+            response = PHRASE_PACKAGE_ERROR.format(error)
+    elif response_format == 'json':
+        response = json.dumps(
+            dict(zip(
+                homework.MESSAGE_FIELDS,
+                homework.get_message_row(message)
+            )),
+            ensure_ascii=False
+        )
+    else:
+        response = message.get_message()
+    return response.encode('utf-8') + b'\n'
+
+
+def handle_package(line: bytes, package_format: str = 'csv',
+                   response_format: str = 'text') -> bytes:
+    """Рассчитать пакет из строки и сформировать ответ."""
+    try:
+        message = homework.read_package(
+            *homework.parse_package(line.decode('utf-8'), package_format)
+        ).show_training_info()
+    except Exception as error:
+        return format_response(None, error, response_format)
+    return format_response(message, None, response_format)
+
+
+async def handle_batched_package(line: bytes,
+                                 batcher: batching.MicroBatcher,
+                                 package_format: str = 'csv',
+                                 response_format: str = 'text') -> bytes:
+    """Рассчитать пакет из строки в пачке с другими и сформировать ответ."""
+    try:
+        message = await batcher.submit(
+            *homework.parse_package(line.decode('utf-8'), package_format)
+        )
+    except Exception as error:
+        return format_response(None, error, response_format)
+    return format_response(message, None, response_format)
+
+
+async def handle_connection(reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter,
+                            package_format: str = 'csv',
+                            response_format: str = 'text',
+                            batcher: Optional[batching.MicroBatcher] = None
+                            ) -> None:
+    """Отвечать на пакеты соединения, пока клиент не закроет его."""
+    try:
+        while line := await reader.readline():
+            if not line.strip():
+                continue
+            if batcher is None:
+                response = handle_package(
+                    line, package_format, response_format
+                )
+            else:
+                response = await handle_batched_package(
+                    line, batcher, package_format, response_format
+                )
+            writer.write(response)
+            await writer.drain()
+    except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(host: str = '127.0.0.1', port: int = 8765,
+                       path: Optional[str] = None,
+                       package_format: str = 'csv',
+                       response_format: str = 'text',
+                       batcher: Optional[batching.MicroBatcher] = None
+                       ) -> asyncio.Server:
+    """Запустить сервер на TCP-порту или Unix-сокете."""
+    async def handler(reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> None:
+        await handle_connection(
+            reader, writer, package_format, response_format, batcher
+        )
+
+    if path is not None:
+        return await asyncio.start_unix_server(
+            handler, path, limit=LINE_LIMIT
+        )
+    return await asyncio.start_server(
+        handler, host, port, limit=LINE_LIMIT
+    )
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8765,
+                path: Optional[str] = None, package_format: str = 'csv',
+                response_format: str = 'text',
+                batcher: Optional[batching.MicroBatcher] = None) -> None:
+    """Обслуживать соединения до остановки процесса."""
+    server = await start_server(
+        host, port, path, package_format, response_format, batcher
+    )
+    print(PHRASE_SERVING.format(path or f'{host}:{port}'))
+    async with server:
+        await server.serve_forever()
+
+
+async def open_connection(host: str, port: int, path: Optional[str]
+                          ) -> tuple[asyncio.StreamReader,
+                                     asyncio.StreamWriter]:
+    """Открыть соединение с сервером по TCP или Unix-сокету."""
+    if path is not None:
+        return await asyncio.open_unix_connection(path, limit=LINE_LIMIT)
+    return await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+
+
+async def send_packages(lines: list[bytes], host: str = '127.0.0.1',
+                        port: int = 8765,
+                        path: Optional[str] = None) -> list[bytes]:
+    """Отправить пакеты по одному соединению и получить ответы."""
+    reader, writer = await open_connection(host, port, path)
+    responses = []
+    try:
+        for line in lines:
+            writer.write(line.rstrip(b'\n') + b'\n')
+            await writer.drain()
+            responses.append(await reader.readline())
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return responses
+
+
+async def run_load(connections: int = 100, count: int = 100,
+                   host: str = '127.0.0.1', port: int = 8765,
+                   path: Optional[str] = None) -> dict[str, float]:
+    """Нагрузить сервер параллельными соединениями и замерить скорость."""
+    batch = [
+        LOAD_PACKAGES[index % len(LOAD_PACKAGES)] for index in range(count)
+    ]
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        send_packages(batch, host, port, path) for _ in range(connections)
+    ))
+    seconds = time.perf_counter() - start
+    packages = sum(len(responses) for responses in results)
+    return {
+        'connections': connections,
+        'packages': packages,
+        'seconds': seconds,
+        'rate': packages / seconds,
+    }
+
+
+def run(argv: Optional[list[str]] = None) -> None:
+    """Запустить сервер или генератор нагрузки."""
+    parser = argparse.ArgumentParser(description='Сервер пакетов трекера.')
+    parser.add_argument('mode', choices=('serve', 'load'))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='путь к Unix-сокету')
+    parser.add_argument(
+        '--format', choices=homework.PACKAGE_FORMATS, default='csv'
+    )
+    parser.add_argument(
+        '--response', choices=RESPONSE_FORMATS, default='text'
+    )
+    parser.add_argument('--connections', type=int, default=100)
+    parser.add_argument('--count', type=int, default=100)
+    parser.add_argument(
+        '--batch-size', type=int, default=0,
+        help='наибольший размер пачки; 0 — считать пакеты по одному'
+    )
+    parser.add_argument(
+        '--batch-delay', type=float, default=batching.MAX_DELAY,
+        help='наибольшее ожидание пополнения пачки под нагрузкой, с'
+    )
+    args = parser.parse_args(argv)
+    if args.mode == 'serve':
+        batcher = None
+        if args.batch_size:
+            batcher = batching.MicroBatcher(args.batch_size, args.batch_delay)
+        asyncio.run(serve(
+            args.host, args.port, args.unix, args.format, args.response,
+            batcher
+        ))
+        return
+    print(PHRASE_LOAD_REPORT.format(**asyncio.run(run_load(
+        args.connections, args.count, args.host, args.port, args.unix
+    ))))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,172 @@
+import argparse
+import mmap
+import struct
+import sys
+from typing import Iterable, Iterator, Optional
+
+import homework
+
+MAGIC = b'WKPK'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sHc9x')
+BLOCK_HEADER = struct.Struct('<4sII4x')
+BYTE_ORDER = b'<' if sys.byteorder == 'little' else b'>'
+BLOCK_SIZE = 64 * 1024
+PHRASE_FORMAT_ERROR = 'файл {} не является файлом пакетов версии {}'
+PHRASE_BYTE_ORDER_ERROR = 'порядок байтов файла {} не совпадает с системным'
+CODE_SIZE = 4
+PHRASE_CODE_ERROR = 'код типа {} длиннее {} байт ASCII и не помещается в блок'
+
+
+class PackageWriter:
+    """Запись пакетов в бинарный файл колоночными блоками по типам."""
+
+    def __init__(self, path: str, block_size: int = BLOCK_SIZE) -> None:
+        self.file = open(path, 'wb')
+        self.block_size = block_size
+        self.tables: dict[str, homework.TrainingTable] = {}
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION, BYTE_ORDER))
+
+    def __enter__(self) -> 'PackageWriter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def write(self, workout_type: str, data: list[float]) -> None:
+        """Добавить пакет, сбросив блок типа при его заполнении."""
+        table = self.tables.get(workout_type)
+        if table is None:
+            workout = homework.get_workout_type(workout_type, len(data))
+            if not (workout_type.isascii()
+                    and len(workout_type) <= CODE_SIZE):
+                raise ValueError(
+                    PHRASE_CODE_ERROR.format(workout_type, CODE_SIZE)
+                )
+            table = self.tables[workout_type] = homework.TrainingTable(
+                workout.training_class
+            )
+        table.append(data)
+        if len(table) >= self.block_size:
+            self.write_block(workout_type)
+
+    def write_many(self,
+                   packages: Iterable[tuple[str, list[float]]]) -> None:
+        """Добавить несколько пакетов."""
+        for workout_type, data in packages:
+            self.write(workout_type, data)
+
+    def write_block(self, workout_type: str) -> None:
+        """Записать накопленные пакеты одного типа блоком колонок."""
+        table = self.tables.pop(workout_type)
+        self.file.write(BLOCK_HEADER.pack(
+            workout_type.encode('ascii'), len(table.columns), len(table)
+        ))
+        for column in table.columns:
+            column.tofile(self.file)
+
+    def close(self) -> None:
+        """Сбросить неполные блоки и закрыть файл."""
+        for workout_type in list(self.tables):
+            self.write_block(workout_type)
+        self.file.close()
+
+
+class PackageReader:
+    """Чтение бинарного файла пакетов через mmap без копирования.
+
+    Выданные колонки действительны до закрытия читателя: close()
+    освобождает их вместе с mmap.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.views: list[memoryview] = []
+        self.path = path
+        with open(path, 'rb') as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.buffer) < FILE_HEADER.size:
+            self.buffer.close()
+            raise ValueError(PHRASE_FORMAT_ERROR.format(path, VERSION))
+        magic, version, byte_order = FILE_HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != VERSION:
+            self.buffer.close()
+            raise ValueError(PHRASE_FORMAT_ERROR.format(path, VERSION))
+        if byte_order != BYTE_ORDER:
+            self.buffer.close()
+            raise ValueError(PHRASE_BYTE_ORDER_ERROR.format(path))
+
+    def __enter__(self) -> 'PackageReader':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def iter_blocks(self) -> Iterator[tuple[str, tuple[memoryview, ...]]]:
+        """Получить блоки как код типа и колонки-представления float64."""
+        error = PHRASE_FORMAT_ERROR.format(self.path, VERSION)
+        view = memoryview(self.buffer)
+        self.views.append(view)
+        offset = FILE_HEADER.size
+        while offset < len(view):
+            if offset + BLOCK_HEADER.size > len(view):
+                raise ValueError(error)
+            code, width, rows = BLOCK_HEADER.unpack_from(view, offset)
+            offset += BLOCK_HEADER.size
+            if offset + width * rows * 8 > len(view):
+                raise ValueError(error)
+            columns = []
+            for _ in range(width):
+                end = offset + rows * 8
+                column = view[offset:end].cast('d')
+                self.views.append(column)
+                columns.append(column)
+                offset = end
+            yield code.rstrip(b'\0').decode('ascii'), tuple(columns)
+
+    def iter_packages(self) -> Iterator[tuple[str, list[float]]]:
+        """Получить пакеты по одному в порядке блоков."""
+        for workout_type, columns in self.iter_blocks():
+            for data in zip(*columns):
+                yield workout_type, list(data)
+
+    def calculate(self) -> Iterator[homework.BatchResult]:
+        """Рассчитать каждый блок пакетным методом его типа."""
+        for workout_type, columns in self.iter_blocks():
+            training_class = homework.get_workout_type(
+                workout_type, len(columns)
+            ).training_class
+            yield training_class.calculate_batch(*columns)
+
+    def close(self) -> None:
+        """Освободить выданные колонки и закрыть mmap."""
+        for view in reversed(self.views):
+            view.release()
+        self.views.clear()
+        self.buffer.close()
+
+
+def run(argv: Optional[list[str]] = None) -> None:
+    """Упаковать текстовые пакеты в бинарный файл или вывести отчёт."""
+    parser = argparse.ArgumentParser(description='Бинарный файл пакетов.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    pack = commands.add_parser('pack')
+    pack.add_argument('source')
+    pack.add_argument('target')
+    pack.add_argument(
+        '--format', choices=homework.PACKAGE_FORMATS, default='csv'
+    )
+    report = commands.add_parser('report')
+    report.add_argument('source')
+    args = parser.parse_args(argv)
+    if args.command == 'pack':
+        with open(args.source, encoding='utf-8') as source:
+            with PackageWriter(args.target) as writer:
+                writer.write_many(homework.iter_packages(source, args.format))
+        return
+    with PackageReader(args.source) as reader:
+        for result in reader.calculate():
+            homework.render_rows(result.get_rows(), sys.stdout)
+
+
+if __name__ == '__main__':
+    run()
@@ -27,5 +27,33 @@ class Capturing(list):
         sys.stdout = self._stdout
 
 
+def get_package_lines(count, user_every=0, users=1, blank_every=0):
+    """Generate CSV package lines via benchmark.generate_packages.
+
+    Every line whose index is not a multiple of `user_every` gets a
+    `user<N>` prefix, and an empty line follows every `blank_every`-th one.
+    """
+    import benchmark
+
+    lines = []
+    for index, (workout_type, data) in enumerate(
+        benchmark.generate_packages(count)
+    ):
+        line = ','.join([workout_type, *map(str, data)])
+        if user_every and index % user_every:
+            line = f'user{index % users}\t{line}'
+        lines.append(line + '\n')
+        if blank_every and index % blank_every == 0:
+            lines.append('\n')
+    return lines
+
+
+def write_packages(path, count, **options):
+    """Write generated CSV package lines to `path`."""
+    path.write_text(
+        ''.join(get_package_lines(count, **options)), encoding='utf-8'
+    )
+
+
 def pytest_make_parametrize_id(config, val):
     return repr(val)
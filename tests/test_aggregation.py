@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+import aggregation
+import homework
+
+DAY = 24 * 60 * 60
+
+
+def make_message(workout_type, data):
+    return homework.read_package(workout_type, data).show_training_info()
+
+
+def test_total():
+    aggregator = aggregation.Aggregator()
+    run = make_message('RUN', [15000, 1, 75])
+    walk = make_message('WLK', [9000, 1, 75, 180])
+    aggregator.add('user', run, 0)
+    aggregator.add('user', run, DAY)
+    aggregator.add_training(
+        'user', homework.SportsWalking(9000, 1, 75, 180), DAY
+    )
+    total = aggregator.get_total('user', 'Running')
+    assert total.count == 2
+    assert total.distance == run.distance * 2
+    assert total.get_mean_speed() == run.speed
+    assert total.calories_max == run.calories
+    everything = aggregator.get_total('user')
+    assert everything.count == 3
+    assert everything.calories == run.calories * 2 + walk.calories
+    assert aggregator.get_total('nobody').count == 0
+
+
+@pytest.mark.parametrize('step, expected', [
+    (None, [1, 2, 1, 2]),
+    (DAY, [1, 2, 2, 2]),
+])
+def test_window(step, expected):
+    aggregator = aggregation.Aggregator(window=2 * DAY, step=step)
+    run = make_message('RUN', [15000, 1, 75])
+    counts = []
+    for day in (0, 1, 2, 3):
+        aggregator.add('user', run, day * DAY + 10)
+        counts.append(
+            aggregator.get_window('user', day * DAY + 20, 'Running').count
+        )
+    assert counts == expected
+
+
+def test_eviction():
+    aggregator = aggregation.Aggregator(max_keys=2, ttl=DAY)
+    run = make_message('RUN', [15000, 1, 75])
+    for user in ('first', 'second', 'third'):
+        aggregator.add(user, run, 0)
+    assert [user for user, _ in aggregator.keys] == ['second', 'third']
+    aggregator.add('third', run, 2 * DAY)
+    assert aggregator.evict(2 * DAY) == 1
+    assert [user for user, _ in aggregator.keys] == ['third']
+
+
+def test_eviction_late_events():
+    aggregator = aggregation.Aggregator(ttl=DAY)
+    run = make_message('RUN', [15000, 1, 75])
+    aggregator.add('fresh', run, 3 * DAY)
+    aggregator.add('late', run, 0)
+    assert aggregator.evict(3 * DAY) == 1
+    assert [user for user, _ in aggregator.keys] == ['fresh']
+
+
+def test_snapshot_restore():
+    aggregator = aggregation.Aggregator(window=2 * DAY, step=DAY)
+    for day, package in enumerate([
+        ('RUN', [15000, 1, 75]),
+        ('SWM', [720, 1, 80, 25, 40]),
+        ('RUN', [1206, 12, 6]),
+    ]):
+        aggregator.add('user', make_message(*package), day * DAY)
+    restored = aggregation.Aggregator.restore(
+        json.loads(json.dumps(aggregator.snapshot()))
+    )
+    assert restored.snapshot() == aggregator.snapshot()
+    assert restored.get_window('user', 2 * DAY) == (
+        aggregator.get_window('user', 2 * DAY)
+    )
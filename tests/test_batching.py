@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+import batching
+import benchmark
+import homework
+import server
+
+
+def test_batches_match_read_package():
+    packages = benchmark.generate_packages(1000)
+
+    async def submit_all():
+        batcher = batching.MicroBatcher(max_size=64)
+        messages = await asyncio.gather(*(
+            batcher.submit(workout_type, data)
+            for workout_type, data in packages
+        ))
+        return batcher, messages
+
+    batcher, messages = asyncio.run(submit_all())
+    assert messages == [
+        homework.read_package(workout_type, data).show_training_info()
+        for workout_type, data in packages
+    ]
+    assert batcher.packages == 1000
+    assert batcher.batches < 1000
+    assert batcher.size == 64
+
+
+def test_batches_use_scalar_overrides(monkeypatch):
+    monkeypatch.setattr(homework, 'TYPES_TRANING', dict(homework.TYPES_TRANING))
+    monkeypatch.setattr(homework, 'WORKOUT_TYPES', dict(homework.WORKOUT_TYPES))
+
+    class Hiking(homework.Running):
+        """Тренировка: поход."""
+
+        def get_spent_calories(self) -> float:
+            return 42.0
+
+    homework.register_workout_type('HIK', Hiking)
+
+    async def submit_all():
+        batcher = batching.MicroBatcher(max_size=8)
+        return await asyncio.gather(*(
+            batcher.submit(workout_type, [15000, 1, 75])
+            for workout_type in ('HIK', 'RUN') * 8
+        ))
+
+    messages = asyncio.run(submit_all())
+    assert [message.calories for message in messages[::2]] == [42.0] * 8
+    assert messages[1] == homework.Running(15000, 1, 75).show_training_info()
+
+
+def test_light_traffic_is_not_delayed():
+    async def submit_one():
+        batcher = batching.MicroBatcher(max_delay=10.0)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        message = await batcher.submit('RUN', [15000, 1, 75])
+        return batcher, message, loop.time() - start
+
+    batcher, message, seconds = asyncio.run(submit_one())
+    assert message == homework.read_package(
+        'RUN', [15000, 1, 75]
+    ).show_training_info()
+    assert seconds < 1.0
+    assert batcher.size == batching.MIN_BATCH
+
+
+def test_size_adapts_to_load():
+    async def submit_waves():
+        batcher = batching.MicroBatcher(max_size=16, max_delay=0.001)
+        sizes = []
+        for count in (1, 2, 4, 8, 16, 32, 1, 1, 1, 1, 1):
+            await asyncio.gather(*(
+                batcher.submit('SWM', [720, 1, 80, 25, 40])
+                for _ in range(count)
+            ))
+            sizes.append(batcher.size)
+        return sizes
+
+    sizes = asyncio.run(submit_waves())
+    assert max(sizes) == 16
+    assert sizes.index(16) < 6
+    assert sizes[-1] < 16
+
+
+def test_error_reaches_only_its_caller():
+    async def submit_mixed():
+        batcher = batching.MicroBatcher()
+        return await asyncio.gather(
+            batcher.submit('RUN', [15000, 1, 75]),
+            batcher.submit('BOX', [1, 1]),
+            batcher.submit('WLK', [9000, 1, 75, 180]),
+            return_exceptions=True
+        )
+
+    running, error, walking = asyncio.run(submit_mixed())
+    assert running.training_type == 'Running'
+    assert isinstance(error, ValueError)
+    assert walking.training_type == 'SportsWalking'
+
+
+@pytest.mark.parametrize('response_format', ['text', 'json'])
+def test_server_roundtrip_batched(response_format):
+    lines = [b'RUN,15000,1,75', b'BOX,1', b'WLK,9000,1,75,180']
+
+    async def roundtrip():
+        tcp_server = await server.start_server(
+            port=0, response_format=response_format,
+            batcher=batching.MicroBatcher()
+        )
+        port = tcp_server.sockets[0].getsockname()[1]
+        async with tcp_server:
+            responses = await server.send_packages(lines, port=port)
+            load = await server.run_load(connections=20, count=5, port=port)
+        return responses, load
+
+    responses, load = asyncio.run(roundtrip())
+    assert responses == [
+        server.handle_package(line, response_format=response_format)
+        for line in lines
+    ]
+    assert load['packages'] == 100
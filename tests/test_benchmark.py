@@ -0,0 +1,41 @@
+import benchmark
+import homework
+
+
+def test_generate_packages():
+    packages = benchmark.generate_packages(30)
+    assert len(packages) == 30
+    assert {workout_type for workout_type, _ in packages} == set(
+        homework.TYPES_TRANING
+    )
+    for package in packages:
+        homework.read_package(*package)
+
+
+def test_run_benchmarks():
+    results = benchmark.run_benchmarks(count=30, repeat=1)
+    assert set(results['speed']) == {
+        'read_package',
+        'InfoMessage.get_message',
+        'main',
+        'PacketParser.iter_trainings',
+        'PacketParser.parse_tables',
+        'ReportWriter[text]',
+        'ReportWriter[compact]',
+        'Swimming.get_spent_calories',
+        'Running.get_spent_calories',
+        'SportsWalking.get_spent_calories',
+        'Swimming.calculate_batch',
+        'Running.calculate_batch',
+        'SportsWalking.calculate_batch',
+    }
+    assert all(ops > 0 for ops in results['speed'].values())
+    assert all(size > 0 for size in results['memory'].values())
+
+
+def test_find_regressions():
+    baseline = {'speed': {'main': 1000.0, 'read_package': 1000.0}}
+    results = {'speed': {'main': 850.0, 'read_package': 950.0}}
+    regressions = benchmark.find_regressions(results, baseline, 0.1)
+    assert len(regressions) == 1
+    assert 'main' in regressions[0]
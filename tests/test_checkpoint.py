@@ -0,0 +1,139 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+from io import StringIO
+
+import pytest
+
+import aggregation
+import checkpoint
+import homework
+from conftest import BASE_DIR, write_packages
+
+
+def get_expected(path, output_format='text'):
+    with open(path, encoding='utf-8') as stream:
+        messages = list(homework.iter_messages(homework.iter_packages(stream)))
+    output = StringIO()
+    with homework.ReportWriter(output, output_format) as writer:
+        writer.write_messages(messages)
+    stats = {}
+    for message in messages:
+        stats.setdefault(message.training_type, aggregation.Stats()).add(
+            message
+        )
+    return output.getvalue(), stats
+
+
+def test_run(tmp_path):
+    source = tmp_path / 'packages.csv'
+    write_packages(source, 500)
+    target = tmp_path / 'report.txt'
+    run = checkpoint.CheckpointedRun(str(source), str(target), batch_size=50)
+    report, stats = get_expected(source)
+    assert run.run() == stats
+    assert target.read_text(encoding='utf-8') == report
+    state = checkpoint.load_checkpoint(str(target) + '.checkpoint')
+    assert state['done'] and state['count'] == 500
+    assert state['offset'] == source.stat().st_size
+    assert state['position'] == target.stat().st_size
+    again = checkpoint.CheckpointedRun(str(source), str(target))
+    assert again.run() == stats
+    assert again.checkpoints == 0
+
+
+@pytest.mark.parametrize('output_format', ['text', 'csv'])
+def test_resume_after_crash(tmp_path, monkeypatch, output_format):
+    source = tmp_path / 'packages.csv'
+    write_packages(source, 300)
+    target = tmp_path / 'report.out'
+    read_package = homework.read_package
+    calls = 0
+
+    def crash(*args):
+        nonlocal calls
+        calls += 1
+        if calls > 200:
+            raise RuntimeError('сбой')
+        return read_package(*args)
+
+    monkeypatch.setattr(homework, 'read_package', crash)
+    run = checkpoint.CheckpointedRun(
+        str(source), str(target), output_format=output_format,
+        interval=0, batch_size=30
+    )
+    with pytest.raises(RuntimeError):
+        run.run()
+    monkeypatch.undo()
+    state = checkpoint.load_checkpoint(run.checkpoint)
+    assert state['count'] == 180 and not state['done']
+    with open(target, 'a', encoding='utf-8') as file:
+        file.write('строка после контрольной точки\n')
+    resumed = checkpoint.CheckpointedRun(
+        str(source), str(target), output_format=output_format,
+        interval=0, batch_size=30
+    )
+    report, stats = get_expected(source, output_format)
+    assert resumed.run() == stats
+    assert target.read_text(encoding='utf-8') == report
+
+
+def test_resume_after_kill(tmp_path):
+    source = tmp_path / 'packages.csv'
+    write_packages(source, 60000)
+    target = tmp_path / 'report.txt'
+    state_path = tmp_path / 'report.txt.checkpoint'
+    command = [
+        sys.executable, 'checkpoint.py', str(source), str(target),
+        '--interval', '0.01',
+    ]
+    process = subprocess.Popen(command, cwd=BASE_DIR)
+    deadline = time.monotonic() + 30
+    while not state_path.exists() and process.poll() is None:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+    os.kill(process.pid, signal.SIGKILL)
+    process.wait()
+    assert not checkpoint.load_checkpoint(str(state_path))['done']
+    subprocess.run(command, cwd=BASE_DIR, check=True)
+    assert target.read_text(encoding='utf-8') == get_expected(source)[0]
+
+
+def test_errors(tmp_path):
+    source = tmp_path / 'packages.csv'
+    write_packages(source, 10)
+    target = tmp_path / 'report.txt'
+    checkpoint.CheckpointedRun(str(source), str(target)).run()
+    other = tmp_path / 'other.csv'
+    write_packages(other, 10)
+    with pytest.raises(ValueError):
+        checkpoint.CheckpointedRun(str(other), str(target)).run()
+    with pytest.raises(ValueError):
+        checkpoint.CheckpointedRun('-', str(target)).run()
+
+
+def test_resume_checks(tmp_path):
+    source = tmp_path / 'packages.csv'
+    write_packages(source, 10)
+    target = tmp_path / 'report.txt'
+    checkpoint.CheckpointedRun(str(source), str(target)).run()
+    with pytest.raises(ValueError):
+        checkpoint.CheckpointedRun(
+            str(source), str(target), package_format='jsonl'
+        ).run()
+    with pytest.raises(ValueError):
+        checkpoint.CheckpointedRun(
+            str(source), str(target), output_format='csv'
+        ).run()
+    state_path = str(target) + '.checkpoint'
+    state = checkpoint.load_checkpoint(state_path)
+    checkpoint.save_checkpoint(state_path, {**state, 'done': False})
+    target.write_text('', encoding='utf-8')
+    with pytest.raises(ValueError):
+        checkpoint.CheckpointedRun(str(source), str(target)).run()
+    assert target.stat().st_size == 0
+    target.unlink()
+    with pytest.raises(ValueError):
+        checkpoint.CheckpointedRun(str(source), str(target)).run()
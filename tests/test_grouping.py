@@ -0,0 +1,116 @@
+import os
+import tracemalloc
+from io import StringIO
+
+import pytest
+
+import benchmark
+import grouping
+import homework
+from conftest import get_package_lines
+
+
+def get_lines(count):
+    return get_package_lines(count, user_every=3, users=5)
+
+
+def get_expected(lines):
+    records = []
+    for index, line in enumerate(lines):
+        user, _, package = line.rpartition('\t')
+        workout_type, data = homework.parse_package(package)
+        records.append((workout_type, user, index, data))
+    return [
+        (user, index, homework.get_message_row(
+            homework.read_package(workout_type, data).show_training_info()
+        ))
+        for workout_type, user, index, data in sorted(records)
+    ]
+
+
+def get_rows(results):
+    return [
+        (user, index, row)
+        for user, result in results
+        for index, row in zip(result.positions, result.get_rows())
+    ]
+
+
+@pytest.mark.parametrize('memory_limit', [
+    grouping.MEMORY_LIMIT,
+    3 * grouping.RUN_MEMORY + 100 * grouping.BATCH_ROW_MEMORY,
+])
+def test_iter_grouped(tmp_path, memory_limit):
+    lines = get_lines(3000)
+    results = list(grouping.iter_grouped(
+        lines, memory_limit=memory_limit, batch_size=100,
+        directory=str(tmp_path)
+    ))
+    assert get_rows(results) == get_expected(lines)
+    assert all(len(result) <= 100 for _, result in results)
+    assert os.listdir(tmp_path) == []
+
+
+def test_spill_and_merge_passes(tmp_path):
+    with grouping.ExternalSorter(
+        3 * grouping.RUN_MEMORY, str(tmp_path)
+    ) as sorter:
+        for index, (workout_type, data) in enumerate(
+            benchmark.generate_packages(5000)
+        ):
+            sorter.add(workout_type, '', index, data)
+        assert len(sorter.runs) > sorter.fan_in == 2
+        records = list(sorter)
+        assert len(sorter.runs) == 2
+    assert [record[:3] for record in records] == sorted(
+        record[:3] for record in records
+    )
+    assert len(records) == 5000
+
+
+def measure_peak(function, *args, **kwargs):
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = function(*args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1] - start
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def test_memory_ceiling():
+    lines = get_lines(20000)
+    memory_limit = 1024 * 1024
+    count, peak = measure_peak(lambda: sum(
+        len(result) for _, result in grouping.iter_grouped(
+            lines, memory_limit=memory_limit
+        )
+    ))
+    assert count == 20000
+    assert peak < memory_limit
+
+
+def test_write_grouped_memory_ceiling():
+    lines = get_lines(20000)
+    memory_limit = 1024 * 1024
+    with open(os.devnull, 'w', encoding='utf-8') as output:
+        count, peak = measure_peak(
+            grouping.write_grouped, lines, output,
+            memory_limit=memory_limit
+        )
+    assert count == 20000
+    assert peak < memory_limit
+
+
+def test_write_grouped_and_errors():
+    output = StringIO()
+    assert grouping.write_grouped(
+        ['RUN,15000,1,75\n', 'SWM,720,1,80,25,40\n'], output, 'csv', 'csv'
+    ) == 2
+    assert output.getvalue().splitlines()[1].startswith('Running,')
+    with pytest.raises(ValueError):
+        grouping.ExternalSorter(2 * grouping.RUN_MEMORY)
+    with pytest.raises(Exception):
+        list(grouping.iter_grouped(['RUN,15000,1\n']))
@@ -1,9 +1,14 @@
+import json
+import os
 import re
+import subprocess
+import sys
 import pytest
 import types
 import inspect
 from collections import namedtuple
-from conftest import Capturing
+from io import StringIO
+from conftest import BASE_DIR, Capturing
 
 try:
     import homework
@@ -451,3 +456,647 @@ def test_main_output(input_data, expected):
     assert get_message_output == expected, (
         'Метод `main` должен печатать результат в консоль.\n'
     )
+
+
+@pytest.mark.parametrize('workout_type, data', [
+    ('SWM', [[720, 1, 80, 25, 40], [1206, 12, 6, 12, 3]]),
+    ('RUN', [[15000, 1, 75], [420, 4, 20], [1206, 12, 6]]),
+    ('WLK', [[9000, 1, 75, 180], [3000.33, 2.512, 75.8, 180.1]]),
+])
+def test_calculate_batch(workout_type, data):
+    training_class = type(homework.read_package(workout_type, data[0]))
+    result = training_class.calculate_batch(*zip(*data))
+    expected = [
+        homework.read_package(workout_type, row).show_training_info()
+        for row in data
+    ]
+    assert result.get_info_messages() == expected, (
+        'Пакетный расчёт должен совпадать с расчётом по одной тренировке.'
+    )
+
+
+@pytest.mark.parametrize('training_class, columns', [
+    (homework.Running, ([15000, 15000], [1, 1], [75])),
+    (homework.SportsWalking, ([9000, 9000], [1, 1], [75, 75], [180])),
+    (homework.Swimming, ([720, 720], [1, 1], [80, 80], [25], [40, 40])),
+    (homework.Swimming, ([720, 720], [1, 1], [80, 80], [25, 25], [40])),
+])
+def test_calculate_batch_length_error(training_class, columns):
+    with pytest.raises(ValueError):
+        training_class.calculate_batch(*columns)
+
+
+def test_calculate_packages():
+    packages = [
+        ('SWM', [720, 1, 80, 25, 40]),
+        ('RUN', [15000, 1, 75]),
+        ('WLK', [9000, 1, 75, 180]),
+        ('RUN', [1206, 12, 6]),
+    ]
+    results = homework.calculate_packages(packages)
+    assert set(results) == {'SWM', 'RUN', 'WLK'}
+    assert results['RUN'].positions == [1, 3]
+    for result in results.values():
+        for position, message in zip(
+            result.positions, result.get_info_messages()
+        ):
+            assert message == homework.read_package(
+                *packages[position]
+            ).show_training_info()
+    with pytest.raises(ValueError):
+        homework.calculate_packages([('BOX', [1, 1, 1])])
+    with pytest.raises(Exception):
+        homework.calculate_packages([('RUN', [1, 1])])
+
+
+@pytest.mark.parametrize('package_format, lines', [
+    ('csv', ['SWM,720,1,80,25,40\n', '\n', 'RUN, 15000, 1, 75\n']),
+    ('jsonl', [
+        '["SWM", [720, 1, 80, 25, 40]]\n',
+        '{"workout_type": "RUN", "data": [15000, 1, 75]}\n',
+    ]),
+])
+def test_iter_packages(package_format, lines):
+    packages = list(homework.iter_packages(iter(lines), package_format))
+    assert packages == [
+        ('SWM', [720, 1, 80, 25, 40]),
+        ('RUN', [15000, 1, 75]),
+    ]
+
+
+def test_render_many():
+    lines = ['WLK,9000,1,75,180', 'RUN,1206,12,6', 'WLK,9000,1.5,75,180']
+    output = StringIO()
+    count = homework.render_many(
+        homework.iter_messages(homework.iter_packages(lines)),
+        output,
+        chunk_size=2
+    )
+    assert count == 3
+    assert output.getvalue().splitlines() == [
+        homework.read_package(*package).show_training_info().get_message()
+        for package in homework.iter_packages(lines)
+    ]
+
+
+def test_run_from_file(tmp_path):
+    path = tmp_path / 'packages.csv'
+    path.write_text('SWM,720,1,80,25,40\n', encoding='utf-8')
+    with Capturing() as output:
+        homework.run([str(path)])
+    assert output == [
+        'Тип тренировки: Swimming; '
+        'Длительность: 1.000 ч.; '
+        'Дистанция: 0.994 км; '
+        'Ср. скорость: 1.000 км/ч; '
+        'Потрачено ккал: 336.000.'
+    ]
+
+
+def test_run_parallel(tmp_path):
+    lines = [
+        'SWM,720,1,80,25,40', 'RUN,15000,1,75', 'WLK,9000,1,75,180',
+        'RUN,1206,12,6', 'WLK,3000.33,2.512,75.8,180.1',
+    ] * 20
+    path = tmp_path / 'packages.csv'
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    ranges = list(homework.iter_byte_ranges(str(path), chunk_bytes=100))
+    assert ranges[0][0] == 0 and ranges[-1][1] == path.stat().st_size
+    assert all(end == start for (_, end), (start, _) in zip(ranges, ranges[1:]))
+    output = StringIO()
+    count = homework.run_parallel(
+        str(path), output, workers=2, chunk_bytes=100
+    )
+    assert count == len(lines)
+    assert output.getvalue().splitlines() == [
+        homework.read_package(*package).show_training_info().get_message()
+        for package in homework.iter_packages(lines)
+    ]
+
+
+@pytest.mark.parametrize('training_class, data', [
+    (homework.Swimming, [720, 1, 80, 25, 40]),
+    (homework.Running, [15000, 1, 75]),
+    (homework.SportsWalking, [9000, 1, 75, 180]),
+])
+def test_slotted_types(training_class, data):
+    slotted = homework.SLOTTED_TYPES[training_class](*data)
+    assert not hasattr(slotted, '__dict__'), (
+        'У экземпляров компактного варианта не должно быть `__dict__`.'
+    )
+    assert isinstance(slotted, homework.SLOTTED_TYPES[homework.Training])
+    assert (
+        slotted.show_training_info()
+        == training_class(*data).show_training_info()
+    )
+
+
+def test_slotted_types_coefficients(monkeypatch):
+    table = homework.TrainingTable(homework.Running)
+    table.append([15000, 1, 75])
+    monkeypatch.setattr(
+        homework.Running, 'CALORIES_MEAN_SPEED_MULTIPLIER', 20
+    )
+    monkeypatch.setattr(homework.Training, 'MIN_IN_H', 30)
+    expected = homework.Running(15000, 1, 75).get_spent_calories()
+    assert table[0].get_spent_calories() == expected
+    assert table.calculate().calories == [expected]
+    monkeypatch.undo()
+    assert table[0].get_spent_calories() == (
+        homework.Running(15000, 1, 75).get_spent_calories()
+    )
+
+
+def test_TrainingTable():
+    table = homework.TrainingTable(homework.SportsWalking)
+    rows = [[9000, 1, 75, 180], [3000.33, 2.512, 75.8, 180.1]]
+    table.extend(rows)
+    assert len(table) == 2
+    assert [row.show_training_info() for row in table] == [
+        homework.SportsWalking(*data).show_training_info() for data in rows
+    ]
+    assert table.calculate().get_info_messages() == [
+        homework.SportsWalking(*data).show_training_info() for data in rows
+    ]
+    with pytest.raises(Exception):
+        table.append([9000, 1, 75])
+
+
+@pytest.mark.parametrize('input_data', [
+    ['Swimming', 1, 75, 1, 80],
+    ['Running', 12, 0.7838999999999999, 0.065325, 12.812],
+    ['SportsWalking', 2.5125, 1.9502145, 0.7762, 408.4295],
+])
+def test_get_message_matches_MESSAGE(input_data):
+    message = homework.InfoMessage(*input_data)
+    expected = message.MESSAGE.format(
+        **dict(zip(
+            ['training_type', 'duration', 'distance', 'speed', 'calories'],
+            input_data
+        ))
+    )
+    assert message.get_message() == expected
+    output = StringIO()
+    homework.render_rows([tuple(input_data)], output)
+    assert output.getvalue() == expected + '\n'
+
+
+def test_render_rows_from_batch():
+    data = [[15000, 1, 75], [420, 4, 20], [1206, 12, 6]]
+    result = homework.Running.calculate_batch(*zip(*data))
+    output = StringIO()
+    assert homework.render_rows(result.get_rows(), output, chunk_size=2) == 3
+    assert output.getvalue().splitlines() == [
+        homework.Running(*row).show_training_info().get_message()
+        for row in data
+    ]
+
+
+def test_register_workout_type(monkeypatch):
+    monkeypatch.setattr(homework, 'TYPES_TRANING', dict(homework.TYPES_TRANING))
+    monkeypatch.setattr(homework, 'WORKOUT_TYPES', dict(homework.WORKOUT_TYPES))
+
+    class Rowing(homework.Swimming):
+        """Тренировка: гребля."""
+
+    workout = homework.register_workout_type('ROW', Rowing)
+    assert workout.arity == 5
+    assert workout.field_names == (
+        'action', 'duration', 'weight', 'length_pool', 'count_pool'
+    )
+    assert homework.TYPES_TRANING['ROW'] is Rowing
+    training = homework.read_package('ROW', [720, 1, 80, 25, 40])
+    assert type(training) is Rowing
+    slotted = homework.SLOTTED_TYPES[Rowing](720, 1, 80, 25, 40)
+    assert slotted.show_training_info() == training.show_training_info()
+    with pytest.raises(Exception):
+        homework.read_package('ROW', [720, 1, 80])
+    with pytest.raises(ValueError):
+        homework.read_package('BOX', [720, 1, 80])
+    homework.TYPES_TRANING['SKI'] = homework.Running
+    assert type(homework.read_package('SKI', [15000, 1, 75])) is (
+        homework.Running
+    )
+    assert homework.WORKOUT_TYPES['SKI'].arity == 3
+
+
+def test_calculate_batch_scalar_override(monkeypatch):
+    monkeypatch.setattr(homework, 'TYPES_TRANING', dict(homework.TYPES_TRANING))
+    monkeypatch.setattr(homework, 'WORKOUT_TYPES', dict(homework.WORKOUT_TYPES))
+
+    class Hiking(homework.Running):
+        """Тренировка: поход."""
+
+        def get_spent_calories(self) -> float:
+            return 42.0
+
+    homework.register_workout_type('HIK', Hiking)
+    assert Hiking.has_scalar_overrides()
+    assert not homework.Running.has_scalar_overrides()
+    assert not homework.SLOTTED_TYPES[homework.Swimming].has_scalar_overrides()
+    result = Hiking.calculate_batch([15000, 9000], [1, 2], [75, 80])
+    assert result.calories == [42.0, 42.0]
+    assert result.training_type == 'Hiking'
+    packages = [('HIK', [15000, 1, 75]), ('RUN', [15000, 1, 75])]
+    results = homework.calculate_packages(packages)
+    assert results['HIK'].calories == [42.0]
+    assert results['HIK'].distance == results['RUN'].distance
+    assert results['RUN'].calories != [42.0]
+
+
+@pytest.mark.parametrize('input_data', [
+    ['SWM', [720, 1, 80, 25, 40]],
+    ['RUN', [15000, 1, 75]],
+    ['WLK', [9000, 1, 75, 180]],
+])
+def test_read_cached_package(input_data):
+    training = homework.read_cached_package(*input_data)
+    expected = homework.read_package(*input_data)
+    assert isinstance(training, type(expected))
+    assert training.show_training_info() == expected.show_training_info()
+    assert set(training._metrics[1]) == {
+        'get_distance', 'get_mean_speed', 'get_spent_calories'
+    }
+
+
+def test_cached_metrics_invalidation():
+    training = homework.read_cached_package('RUN', [15000, 1, 75])
+    assert training.get_spent_calories() == (
+        homework.Running(15000, 1, 75).get_spent_calories()
+    )
+    training.duration = 2
+    assert training.get_mean_speed() == 4.875
+    assert training.get_spent_calories() == (
+        homework.Running(15000, 2, 75).get_spent_calories()
+    )
+    training.CACHE_METRICS = False
+    training.get_distance()
+    assert 'get_distance' not in training.__dict__.get('_metrics', {})
+
+
+@pytest.mark.parametrize('input_data, expected', [
+    (['SWM', [720, 1, 80, 25, 40]], (
+        lambda speed: (speed + 1.1) * 2 * 80 * 1
+    )),
+    (['RUN', [15000, 1, 75]], (
+        lambda speed: (18 * speed + 1.79) * (75 / 1000) * (1 * 60)
+    )),
+    (['WLK', [9000, 1, 75, 180]], (
+        lambda speed: (
+            0.035 * 75 + ((speed * 0.278)**2 / 180 * 100) * 0.029 * 75
+        ) * 1 * 60
+    )),
+])
+def test_coefficients(input_data, expected):
+    training = homework.read_package(*input_data)
+    assert training.get_spent_calories() == pytest.approx(
+        expected(training.get_mean_speed()), rel=1e-12
+    )
+
+
+def test_coefficients_base_constant_change(monkeypatch):
+    cached = homework.CACHED_TYPES[homework.Running]
+    before = homework.Running.coefficients
+    monkeypatch.setattr(homework.Training, 'MIN_IN_H', 30)
+    assert homework.Running.coefficients == (18, 1.79, 0.03)
+    assert cached.coefficients == homework.Running.coefficients
+    monkeypatch.undo()
+    assert homework.Running.coefficients == before
+
+
+IMPORT_TIME_BUDGET = 0.050
+IMPORT_TIME_LIMIT = 0.250
+IMPORT_TIME_RUNS = 5
+IMPORT_TIME_ENV = 'HOMEWORK_IMPORT_TIME'
+LAZY_MODULES = (
+    'argparse', 'dataclasses', 'inspect', 'json', 'multiprocessing', 'string'
+)
+IMPORT_CODE = (
+    'import sys\n'
+    'import homework\n'
+    f'print(*sorted(set({LAZY_MODULES!r}) & sys.modules.keys()))\n'
+    'print(*homework.WORKOUT_TYPES)\n'
+    'homework.read_package("RUN", [15000, 1, 75])\n'
+    'print(*homework.WORKOUT_TYPES)\n'
+)
+IMPORT_TIME_CODE = (
+    'import time\n'
+    'start = time.perf_counter()\n'
+    'import homework\n'
+    'print(time.perf_counter() - start)\n'
+)
+
+
+def test_import_is_lazy():
+    lazy_modules, registered, used = subprocess.run(
+        [sys.executable, '-c', IMPORT_CODE],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True
+    ).stdout.splitlines()
+    assert lazy_modules == '', (
+        f'Модули {lazy_modules} не должны загружаться при импорте.'
+    )
+    assert registered == '', (
+        'Типы тренировок должны регистрироваться при первом обращении.'
+    )
+    assert used == 'RUN'
+
+
+def test_import_time():
+    budget = (
+        IMPORT_TIME_BUDGET if os.environ.get(IMPORT_TIME_ENV)
+        else IMPORT_TIME_LIMIT
+    )
+    subprocess.run(
+        [sys.executable, '-m', 'py_compile', 'homework.py'],
+        cwd=BASE_DIR, check=True
+    )
+    seconds = min(
+        float(subprocess.run(
+            [sys.executable, '-c', IMPORT_TIME_CODE],
+            cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout)
+        for _ in range(IMPORT_TIME_RUNS)
+    )
+    assert seconds < budget, (
+        f'Импорт `homework.py` занял {seconds:.3f} с при бюджете '
+        f'{budget} с.'
+    )
+
+
+def test_compile_message():
+    message = homework.InfoMessage('Running', 1, 9.75, 9.75, 699.75)
+    values = homework.get_message_row(message)
+    assert homework.compile_message(message.MESSAGE) % values == (
+        message.MESSAGE.format(**dict(zip(homework.MESSAGE_FIELDS, values)))
+    )
+    assert homework.compile_message('{a:.1f}% {{b}} {c}', 's') == (
+        '%s%% {b} %s'
+    )
+
+
+TRAININGS = [
+    homework.Swimming(720, 1, 80, 25, 40),
+    homework.Running(15000, 1, 75),
+    homework.SportsWalking(9000, 1, 75, 180),
+]
+
+
+def test_main_many():
+    with Capturing() as expected:
+        for training in TRAININGS:
+            homework.main(training)
+    with Capturing() as output:
+        count = homework.main_many(TRAININGS, block_size=1)
+    assert count == 3
+    assert output == expected
+
+
+@pytest.mark.parametrize('output_format', ['jsonl', 'csv'])
+def test_ReportWriter_formats(output_format):
+    output = StringIO()
+    with homework.ReportWriter(output, output_format) as writer:
+        writer.write_trainings(TRAININGS)
+    lines = output.getvalue().splitlines()
+    messages = [training.show_training_info() for training in TRAININGS]
+    if output_format == 'csv':
+        assert lines[0] == 'training_type,duration,distance,speed,calories'
+        rows = [line.split(',') for line in lines[1:]]
+        assert [
+            (name, *map(float, values)) for name, *values in rows
+        ] == [homework.get_message_row(message) for message in messages]
+    else:
+        assert [json.loads(line) for line in lines] == [
+            dict(zip(
+                homework.MESSAGE_FIELDS, homework.get_message_row(message)
+            ))
+            for message in messages
+        ]
+
+
+def test_ReportWriter_file_descriptor(tmp_path):
+    path = tmp_path / 'report.txt'
+    with open(path, 'wb') as file:
+        with homework.ReportWriter(file.fileno(), block_size=100) as writer:
+            writer.write_trainings(TRAININGS * 10)
+    assert path.read_text(encoding='utf-8').splitlines() == [
+        training.show_training_info().get_message()
+        for training in TRAININGS * 10
+    ]
+    with pytest.raises(ValueError):
+        homework.ReportWriter(StringIO(), 'xml')
+
+
+def test_ReportWriter_compact():
+    output = StringIO()
+    with homework.ReportWriter(output, 'compact') as writer:
+        writer.write_trainings(TRAININGS)
+        writer.write_rows([('Rowing', 1, 2, 3, 4)])
+    lines = output.getvalue().splitlines()
+    assert lines[:3] == ['=SWM,Swimming', '=RUN,Running', '=WLK,SportsWalking']
+    assert lines[3] == 'SWM,1.000,0.994,1.000,336.000'
+    assert list(homework.expand_compact(lines)) == [
+        training.show_training_info().get_message()
+        for training in TRAININGS
+    ] + [homework.InfoMessage('Rowing', 1, 2, 3, 4).get_message()]
+
+
+@pytest.mark.parametrize('output_format', homework.OUTPUT_FORMATS)
+def test_ReportWriter_cache(output_format):
+    trainings = TRAININGS * 5
+    expected = StringIO()
+    with homework.ReportWriter(expected, output_format) as writer:
+        writer.write_trainings(trainings)
+    output = StringIO()
+    with homework.ReportWriter(
+        output, output_format, cache_size=2
+    ) as writer:
+        writer.write_trainings(trainings)
+        assert len(writer.lines) <= 2
+    assert output.getvalue() == expected.getvalue()
+
+
+@pytest.mark.parametrize('output_format', homework.OUTPUT_FORMATS)
+def test_ReportWriter_cache_keeps_types(output_format):
+    rows = [
+        ('Running', 1.0, 9.75, 9.75, 699.75),
+        ('Running', 1, 9.75, 9.75, 699.75),
+        ('Running', 1, 0.0, 0.0, 1.79),
+        ('Running', 1, -0.0, -0.0, 1.79),
+    ]
+    expected = StringIO()
+    with homework.ReportWriter(expected, output_format) as writer:
+        writer.write_rows(rows)
+    output = StringIO()
+    with homework.ReportWriter(
+        output, output_format, cache_size=10
+    ) as writer:
+        writer.write_rows(rows)
+    assert output.getvalue() == expected.getvalue()
+
+
+def test_run_expand(tmp_path):
+    path = tmp_path / 'packages.csv'
+    path.write_text(
+        'SWM,720,1,80,25,40\nRUN,15000,1,75\n', encoding='utf-8'
+    )
+    with Capturing() as expected:
+        homework.run([str(path), '--render-cache', '10'])
+    with Capturing() as compact:
+        homework.run([str(path), '--output-format', 'compact'])
+    report = tmp_path / 'report.compact'
+    report.write_text('\n'.join(compact) + '\n', encoding='utf-8')
+    with Capturing() as output:
+        homework.run([str(report), '--expand'])
+    assert output == expected
+
+
+def test_PackageCache():
+    cache = homework.PackageCache(maxsize=2)
+    first = cache.get_info('RUN', [15000, 1, 75])
+    assert first == homework.read_package(
+        'RUN', [15000, 1, 75]
+    ).show_training_info()
+    assert cache.get_info('RUN', [15000, 1, 75]) is first
+    floats = cache.get_info('RUN', [15000.0, 1.0, 75.0])
+    assert type(floats.duration) is float
+    writer = homework.ReportWriter(StringIO(), 'csv')
+    assert writer.format_row(homework.get_message_row(floats)) == (
+        writer.format_row(homework.get_message_row(
+            homework.read_package(
+                'RUN', [15000.0, 1.0, 75.0]
+            ).show_training_info()
+        ))
+    )
+    cache.get_info('WLK', [9000, 1, 75, 180])
+    assert len(cache) == 2
+    assert cache.stats == homework.CacheStats(hits=1, misses=3, evictions=1)
+
+
+def test_PackageCache_coefficient_change(monkeypatch):
+    cache = homework.PackageCache()
+    before = cache.get_info('SWM', [720, 1, 80, 25, 40])
+    training = homework.read_cached_package('SWM', [720, 1, 80, 25, 40])
+    training.get_spent_calories()
+    monkeypatch.setattr(homework.Swimming, 'MEAN_SPEED_ADDITION', 2.1)
+    after = cache.get_info('SWM', [720, 1, 80, 25, 40])
+    assert after.calories == before.calories + 160
+    assert training.get_spent_calories() == after.calories
+    assert cache.stats.misses == 2
+
+
+RAW_PACKETS = [
+    b'SWM,720,1,80,25,40\n',
+    b'RUN,15000,1,75\r\n',
+    b'\n',
+    b'WLK,9000,1,75,180\n',
+    b'BOX,1,1,1\n',
+    b'RUN,15000,1\n',
+    b'RUN,15000,one,75\n',
+    b',1,2\n',
+    b'  \t\n',
+    b'WLK,3000.33,2.512,75.8,180.1',
+]
+
+
+def test_PacketParser_iter_trainings():
+    parser = homework.PacketParser()
+    trainings = list(parser.iter_trainings(RAW_PACKETS))
+    assert trainings == [
+        homework.Swimming(720, 1, 80, 25, 40),
+        homework.Running(15000, 1, 75),
+        homework.SportsWalking(9000, 1, 75, 180),
+        homework.SportsWalking(3000.33, 2.512, 75.8, 180.1),
+    ]
+    assert parser.stats == homework.ParseStats(lines=8, malformed=4)
+
+
+def test_PacketParser_parse_tables():
+    parser = homework.PacketParser()
+    tables = parser.parse_tables(b''.join(RAW_PACKETS).splitlines())
+    assert {code: len(table) for code, table in tables.items()} == {
+        'SWM': 1, 'RUN': 1, 'WLK': 2
+    }
+    assert tables['WLK'].calculate().get_info_messages() == [
+        homework.SportsWalking(9000, 1, 75, 180).show_training_info(),
+        homework.SportsWalking(
+            3000.33, 2.512, 75.8, 180.1
+        ).show_training_info(),
+    ]
+
+
+@pytest.mark.parametrize('suffix', ['.csv', '.csv.gz', '.csv.bz2'])
+@pytest.mark.parametrize('output_format', ['text', 'csv', 'compact'])
+def test_run_threaded(tmp_path, suffix, output_format):
+    import bz2
+    import gzip
+    lines = [
+        'SWM,720,1,80,25,40', 'RUN,15000,1,75', 'WLK,9000,1,75,180',
+        'RUN,1206,12,6', 'WLK,3000.33,2.512,75.8,180.1',
+    ] * 30
+    text = '\n'.join(lines) + '\n'
+    path = tmp_path / f'packages{suffix}'
+    opener = {'.csv': open, '.csv.gz': gzip.open, '.csv.bz2': bz2.open}
+    with opener[suffix](path, 'wt', encoding='utf-8') as file:
+        file.write(text)
+    output = StringIO()
+    count = homework.run_threaded(
+        str(path), output, workers=3, output_format=output_format,
+        batch_size=7, queue_size=2
+    )
+    assert count == len(lines)
+    expected = StringIO()
+    with homework.ReportWriter(expected, output_format) as writer:
+        writer.write_messages(
+            homework.iter_messages(homework.iter_packages(lines))
+        )
+    assert output.getvalue() == expected.getvalue()
+    with homework.open_input(str(path), 'rb') as stream:
+        assert stream.read() == text.encode('utf-8')
+
+
+def test_run_threaded_error(tmp_path):
+    path = tmp_path / 'packages.csv'
+    path.write_text('RUN,15000,1,75\nBOX,1,1\n' * 50, encoding='utf-8')
+    with pytest.raises(ValueError):
+        homework.run_threaded(str(path), StringIO(), batch_size=3, queue_size=1)
+    with pytest.raises(ValueError):
+        homework.run_threaded(str(path), StringIO(), workers=0)
+    with pytest.raises(SystemExit):
+        homework.run([str(path), '--threads', '0'])
+
+
+@pytest.mark.parametrize('options', [
+    ['--workers', '2', '--threads', '2'],
+    ['--threads', '2', '--expand'],
+    ['--workers', '2', '--cache-size', '8'],
+    ['--threads', '2', '--render-cache', '8'],
+    ['--threads', '2', '--block-size', '64'],
+    ['--expand', '--cache-size', '8'],
+])
+def test_run_mode_options_error(tmp_path, capsys, options):
+    path = tmp_path / 'packages.csv'
+    path.write_text('RUN,15000,1,75\n', encoding='utf-8')
+    with pytest.raises(SystemExit):
+        homework.run([str(path), *options])
+    assert capsys.readouterr().out == ''
+
+
+def test_run_threaded_stops_on_error(tmp_path, monkeypatch):
+    path = tmp_path / 'packages.csv'
+    path.write_text(
+        'BOX,1,1\n' + 'RUN,15000,1,75\n' * 10000, encoding='utf-8'
+    )
+    render_lines = homework.render_lines
+    calls = 0
+
+    def count_batches(*args):
+        nonlocal calls
+        calls += 1
+        return render_lines(*args)
+
+    monkeypatch.setattr(homework, 'render_lines', count_batches)
+    with pytest.raises(ValueError):
+        homework.run_threaded(
+            str(path), StringIO(), workers=2, batch_size=10, queue_size=4
+        )
+    assert calls < 100
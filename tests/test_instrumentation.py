@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+import homework
+import instrumentation
+from conftest import Capturing
+
+PACKAGES = [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('RUN', [15000, 1, 75]),
+    ('WLK', [9000, 1, 75, 180]),
+    ('RUN', [1206, 12, 6]),
+]
+
+
+def run_packages():
+    with Capturing() as output:
+        for package in PACKAGES:
+            homework.main(homework.read_package(*package))
+    return output
+
+
+def test_disabled_by_default():
+    assert homework.INSTRUMENTATION is None
+
+
+def test_counters_and_histograms():
+    expected = run_packages()
+    sink = instrumentation.MemorySink()
+    instrumentation.enable(instrumentation.Instrumentation(sink))
+    try:
+        assert run_packages() == expected
+    finally:
+        instrumentation.disable()
+    assert homework.INSTRUMENTATION is None
+    stages = sink.snapshots[-1]['stages']
+    assert set(stages) == {
+        'read_package', 'get_spent_calories', 'get_message', 'main'
+    }
+    assert stages['read_package']['Running']['calls'] == 2
+    assert stages['main']['Swimming']['count'] == 1
+    assert sum(stages['get_message']['Running']['buckets']) == 2
+
+
+def test_sampling_and_file_sink(tmp_path):
+    path = tmp_path / 'metrics.jsonl'
+    instrumentation.enable(instrumentation.Instrumentation(
+        instrumentation.FileSink(str(path)), sample_every=2, interval=0
+    ))
+    try:
+        run_packages()
+    finally:
+        instrumentation.disable()
+    snapshots = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(snapshots) > 1
+    stages = snapshots[-1]['stages']
+    assert set(stages) == {
+        'read_package', 'get_spent_calories', 'get_message', 'main'
+    }
+    for stage in stages.values():
+        for item in stage.values():
+            assert item['count'] == (item['calls'] + 1) // 2
+    assert stages['main']['Running'] == {
+        **stages['main']['Running'], 'calls': 2, 'count': 1
+    }
+
+
+def test_sampling_every_stage():
+    sink = instrumentation.MemorySink()
+    instrumentation.enable(
+        instrumentation.Instrumentation(sink, sample_every=2)
+    )
+    try:
+        with Capturing():
+            for _ in range(100):
+                homework.main(homework.read_package('RUN', [15000, 1, 75]))
+    finally:
+        instrumentation.disable()
+    stages = sink.snapshots[-1]['stages']
+    assert {
+        stage: item['Running']['count'] for stage, item in stages.items()
+    } == {
+        'read_package': 50,
+        'get_spent_calories': 50,
+        'get_message': 50,
+        'main': 50,
+    }
+
+
+@pytest.mark.parametrize('sample_every', [0, -1])
+def test_sample_every_error(sample_every):
+    with pytest.raises(ValueError):
+        instrumentation.Instrumentation(sample_every=sample_every)
+
+
+def test_percentile():
+    histogram = instrumentation.Histogram()
+    for seconds in (0.5e-6, 3e-6, 3e-6, 1e-3):
+        histogram.add(seconds)
+    assert histogram.get_percentile(0.5) == 4e-6
+    assert histogram.get_percentile(1) == 1024e-6
@@ -0,0 +1,82 @@
+import json
+
+import benchmark
+import profiling
+from conftest import Capturing
+
+
+def test_profile(tmp_path):
+    summary = profiling.profile(
+        benchmark.generate_packages(300), str(tmp_path), repeat=3
+    )
+    assert set(summary['types']) == {'Running', 'SportsWalking', 'Swimming'}
+    running = summary['types']['Running']
+    assert running['packages'] == 100
+    assert running['functions']['homework.py:read_package']['calls'] == 300
+    assert 'homework.py:get_spent_calories' in running['functions']
+    assert running['allocations']['peak'] > 0
+    assert all(
+        not site.startswith('tracemalloc')
+        for site in running['allocations']['sites']
+    )
+    assert json.loads((tmp_path / 'profile.json').read_text()) == summary
+    assert (tmp_path / 'Running.pstats').exists()
+    for line in (tmp_path / 'stacks.folded').read_text().splitlines():
+        stack, count = line.rsplit(' ', 1)
+        assert stack.split(';')[:2] in (
+            [name, 'profiling.py:run_workload'] for name in summary['types']
+        )
+        assert int(count) > 0
+
+
+def test_sample_stacks():
+    stacks = profiling.sample_stacks(
+        benchmark.generate_packages(3000), repeat=5, interval=0.0005
+    )
+    assert sum(stacks.values()) > 0
+    assert all(
+        stack[0] == 'profiling.py:run_workload' for stack in stacks
+    )
+
+
+def test_diff(tmp_path):
+    before = {'types': {'Running': {'functions': {
+        'homework.py:read_package': {'tottime': 1.0},
+        'homework.py:main': {'tottime': 0.5},
+    }}}}
+    after = {'types': {'Running': {'functions': {
+        'homework.py:read_package': {'tottime': 0.4},
+        'homework.py:get_message': {'tottime': 0.1},
+    }}}}
+    assert profiling.diff_profiles(before, after) == [
+        ('Running', 'homework.py:read_package', 1.0, 0.4),
+        ('Running', 'homework.py:main', 0.5, 0.0),
+        ('Running', 'homework.py:get_message', 0.0, 0.1),
+    ]
+    (tmp_path / 'a.folded').write_text('Running;a;b 3\nRunning;a 1\n')
+    (tmp_path / 'b.folded').write_text('Running;a;b 2\nRunning;a;c 4\n')
+    profiling.write_folded_diff(
+        str(tmp_path / 'a.folded'), str(tmp_path / 'b.folded'),
+        str(tmp_path / 'diff.folded')
+    )
+    assert (tmp_path / 'diff.folded').read_text().splitlines() == [
+        'Running;a 1 0', 'Running;a;b 3 2', 'Running;a;c 0 4',
+    ]
+
+
+def test_run(tmp_path):
+    source = tmp_path / 'packages.csv'
+    source.write_text('SWM,720,1,80,25,40\nRUN,15000,1,75\n')
+    for name in ('before', 'after'):
+        with Capturing():
+            profiling.run([
+                'record', str(tmp_path / name), '--input', str(source)
+            ])
+    with Capturing() as output:
+        profiling.run([
+            'diff', str(tmp_path / 'before'), str(tmp_path / 'after'),
+            '--top', '3', '--folded', str(tmp_path / 'diff.folded')
+        ])
+    assert len(output) == 3
+    assert output[0].split()[0] in ('Running', 'Swimming')
+    assert (tmp_path / 'diff.folded').exists()
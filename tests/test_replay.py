@@ -0,0 +1,111 @@
+import json
+import subprocess
+import sys
+from io import StringIO
+
+import pytest
+
+import homework
+import replay
+from conftest import BASE_DIR, write_packages
+
+
+def write_input(path, count=300):
+    write_packages(path, count, user_every=2, users=7, blank_every=50)
+
+
+def get_single_node(path, output_format='text'):
+    with open(path, encoding='utf-8') as stream:
+        messages = [
+            homework.read_package(
+                *homework.parse_package(package)
+            ).show_training_info()
+            for _, package in map(replay.split_key, stream)
+            if package.strip()
+        ]
+    output = StringIO()
+    with homework.ReportWriter(output, output_format) as writer:
+        writer.write_messages(messages)
+    totals = replay.summarize(messages)
+    return output.getvalue(), {
+        name: totals[name].get_stats() for name in sorted(totals)
+    }
+
+
+def test_shard_is_deterministic():
+    assert replay.get_shard('user1', 4) == 1
+    assert replay.get_shard('RUN,15000,1,75', 4) == 0
+    assert replay.split_key('user1\tRUN,15000,1,75\n') == (
+        'user1', 'RUN,15000,1,75\n'
+    )
+    assert replay.split_key('RUN,15000,1,75\n') == (
+        'RUN,15000,1,75', 'RUN,15000,1,75\n'
+    )
+
+
+def test_partial_stats_merge_is_exact():
+    values = [1e16, 1.0, -1e16, 0.1, 0.2, 0.3]
+    whole = replay.PartialStats()
+    parts = [replay.PartialStats(), replay.PartialStats()]
+    for index, value in enumerate(values):
+        message = homework.InfoMessage('Running', value, value, value, value)
+        whole.add(message)
+        parts[index % 2].add(message)
+    parts[1].merge(parts[0])
+    assert parts[1].get_stats() == whole.get_stats()
+    assert whole.get_stats().duration == 1.6
+
+
+@pytest.mark.parametrize('output_format', homework.OUTPUT_FORMATS)
+def test_run_local(tmp_path, output_format):
+    source = tmp_path / 'packages.csv'
+    write_input(source)
+    expected_report, expected_stats = get_single_node(source, output_format)
+    output = StringIO()
+    stats = replay.run_local(
+        str(source), str(tmp_path), 3, output, output_format=output_format
+    )
+    assert output.getvalue() == expected_report
+    assert stats == expected_stats
+    counts = [
+        json.loads(
+            (tmp_path / f'part-{shard:05d}-of-00003.json').read_text()
+        )['lines']
+        for shard in range(3)
+    ]
+    assert sum(counts) == 300
+    assert all(counts)
+
+
+def test_shard_processes(tmp_path):
+    source = tmp_path / 'packages.csv'
+    write_input(source, 100)
+    processes = [
+        subprocess.Popen([
+            sys.executable, 'replay.py', 'shard', str(source),
+            str(tmp_path), '--shard', str(shard), '--shards', '4',
+        ], cwd=BASE_DIR)
+        for shard in range(4)
+    ]
+    assert all(process.wait() == 0 for process in processes)
+    summary = tmp_path / 'summary.json'
+    result = subprocess.run(
+        [
+            sys.executable, 'replay.py', 'merge', str(tmp_path),
+            '--shards', '4', '--summary', str(summary),
+        ],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True
+    )
+    expected_report, expected_stats = get_single_node(source)
+    assert result.stdout == expected_report
+    assert json.loads(summary.read_text()).keys() == expected_stats.keys()
+
+
+def test_missing_shard(tmp_path):
+    source = tmp_path / 'packages.csv'
+    write_input(source, 10)
+    replay.run_shard(str(source), str(tmp_path), 0, 2)
+    with pytest.raises(ValueError):
+        replay.merge_shards(str(tmp_path), 2, StringIO())
+    with pytest.raises(ValueError):
+        replay.run_shard(str(source), str(tmp_path), 2, 2)
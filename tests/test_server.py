@@ -0,0 +1,44 @@
+import asyncio
+import json
+
+import homework
+import server
+
+
+def test_handle_package():
+    assert server.handle_package(b'RUN,15000,1,75\n') == (
+        homework.read_package('RUN', [15000, 1, 75])
+        .show_training_info().get_message().encode('utf-8') + b'\n'
+    )
+    response = json.loads(
+        server.handle_package(b'["WLK", [9000, 1, 75, 180]]', 'jsonl', 'json')
+    )
+    assert response == {
+        'training_type': 'SportsWalking',
+        'duration': 1,
+        'distance': 5.85,
+        'speed': 5.85,
+        'calories': homework.SportsWalking(
+            9000, 1, 75, 180
+        ).get_spent_calories(),
+    }
+    assert 'error' in json.loads(
+        server.handle_package(b'BOX,1,1', response_format='json')
+    )
+
+
+def test_server_roundtrip():
+    async def roundtrip():
+        tcp_server = await server.start_server(port=0)
+        port = tcp_server.sockets[0].getsockname()[1]
+        async with tcp_server:
+            responses = await server.send_packages(
+                [b'RUN,15000,1,75', b'BOX,1'], port=port
+            )
+            load = await server.run_load(connections=20, count=5, port=port)
+        return responses, load
+
+    responses, load = asyncio.run(roundtrip())
+    assert responses[0].decode('utf-8').startswith('Тип тренировки: Running')
+    assert responses[1].decode('utf-8').startswith('Ошибка: ')
+    assert load['packages'] == 100
@@ -0,0 +1,91 @@
+import pytest
+
+import homework
+import storage
+
+PACKAGES = [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('RUN', [15000, 1, 75]),
+    ('WLK', [9000, 1, 75, 180]),
+    ('RUN', [1206, 12, 6]),
+    ('WLK', [3000.33, 2.512, 75.8, 180.1]),
+]
+
+
+def test_roundtrip(tmp_path):
+    path = str(tmp_path / 'packages.wkpk')
+    with storage.PackageWriter(path, block_size=1) as writer:
+        writer.write_many(PACKAGES)
+    with storage.PackageReader(path) as reader:
+        assert sorted(reader.iter_packages()) == sorted(PACKAGES)
+        blocks = list(reader.iter_blocks())
+        assert all(
+            isinstance(column, memoryview)
+            for _, columns in blocks for column in columns
+        )
+    with pytest.raises(ValueError):
+        blocks[0][1][0][0]
+
+
+def test_close_with_exception(tmp_path):
+    path = str(tmp_path / 'packages.wkpk')
+    with storage.PackageWriter(path) as writer:
+        writer.write_many(PACKAGES)
+    with pytest.raises(RuntimeError):
+        with storage.PackageReader(path) as reader:
+            for _ in reader.iter_blocks():
+                raise RuntimeError('сбой')
+
+
+def test_calculate(tmp_path):
+    path = str(tmp_path / 'packages.wkpk')
+    with storage.PackageWriter(path) as writer:
+        writer.write_many(PACKAGES)
+    with storage.PackageReader(path) as reader:
+        messages = [
+            message
+            for result in reader.calculate()
+            for message in result.get_info_messages()
+        ]
+    assert sorted(messages, key=repr) == sorted(
+        (
+            homework.read_package(*package).show_training_info()
+            for package in PACKAGES
+        ),
+        key=repr
+    )
+
+
+def test_invalid_file(tmp_path):
+    path = tmp_path / 'packages.csv'
+    path.write_bytes(b'RUN,15000,1,75\n' * 2)
+    with pytest.raises(ValueError):
+        storage.PackageReader(str(path))
+    with pytest.raises(ValueError):
+        with storage.PackageWriter(str(tmp_path / 'bad.wkpk')) as writer:
+            writer.write('BOX', [1, 1, 1])
+
+
+@pytest.mark.parametrize('cut', [1, 8, 16, 8 * 10 * 4, 8 * 10 * 4 + 4])
+def test_truncated_file(tmp_path, cut):
+    path = tmp_path / 'packages.wkpk'
+    with storage.PackageWriter(str(path)) as writer:
+        writer.write_many([('WLK', [9000, 1, 75, 180])] * 10)
+    path.write_bytes(path.read_bytes()[:-cut])
+    with storage.PackageReader(str(path)) as reader:
+        with pytest.raises(ValueError):
+            list(reader.iter_packages())
+        with pytest.raises(ValueError):
+            list(reader.calculate())
+    path.write_bytes(storage.MAGIC)
+    with pytest.raises(ValueError):
+        storage.PackageReader(str(path))
+
+
+def test_long_code(tmp_path, monkeypatch):
+    monkeypatch.setattr(homework, 'TYPES_TRANING', dict(homework.TYPES_TRANING))
+    monkeypatch.setattr(homework, 'WORKOUT_TYPES', dict(homework.WORKOUT_TYPES))
+    homework.register_workout_type('NORDIC', homework.SportsWalking)
+    with pytest.raises(ValueError):
+        with storage.PackageWriter(str(tmp_path / 'long.wkpk')) as writer:
+            writer.write('NORDIC', [9000, 1, 75, 180])
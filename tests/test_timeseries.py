@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+import homework
+import timeseries
+
+SERIES = [
+    (homework.Running, (75,), 1),
+    (homework.SportsWalking, (75, 180), 1),
+    (homework.Swimming, (80, 25), 2),
+]
+
+
+def get_samples(count_columns, count=600, seed=0):
+    generator = random.Random(seed)
+    samples = [
+        [generator.randint(0, 5) for _ in range(count)],
+        [1 / 3600] * count,
+    ]
+    if count_columns == 2:
+        samples.append([generator.randint(0, 1) for _ in range(count)])
+    return samples
+
+
+@pytest.mark.parametrize('training_class, constants, count_columns', SERIES)
+def test_collapse(training_class, constants, count_columns):
+    samples = get_samples(count_columns)
+    series = timeseries.TrainingSeries(training_class, constants)
+    series.append(*samples)
+    totals = dict(zip(
+        timeseries.get_sample_fields(training_class), map(sum, samples)
+    ))
+    constants = iter(constants)
+    expected = training_class(*(
+        totals[name] if name in totals else next(constants)
+        for name in series.field_names
+    ))
+    assert series.collapse() == expected
+    assert series.show_training_info() == expected.show_training_info()
+    info = series.get_range_info(0, len(series))
+    assert info.duration == pytest.approx(expected.duration)
+    assert info.distance == pytest.approx(expected.get_distance())
+    assert info.speed == pytest.approx(expected.get_mean_speed())
+    if training_class is not homework.SportsWalking:
+        assert info.calories == pytest.approx(expected.get_spent_calories())
+
+
+@pytest.mark.parametrize('training_class, constants, count_columns', SERIES)
+def test_incremental_append(training_class, constants, count_columns):
+    samples = get_samples(count_columns)
+    whole = timeseries.TrainingSeries(training_class, constants)
+    whole.append(*samples)
+    series = timeseries.TrainingSeries(training_class, constants)
+    for start in range(0, 600, 7):
+        series.append(*(column[start:start + 7] for column in samples))
+    assert len(series) == 600
+    assert series.segments == whole.segments
+    assert series.totals == whole.totals
+    assert list(series.burned) == pytest.approx(list(whole.burned))
+    assert series.burned[-1] == pytest.approx(sum(whole.segments.calories))
+
+
+def test_segments_and_ranges():
+    series = timeseries.TrainingSeries(homework.Running, (75,))
+    series.append([2, 4], [1 / 3600, 1 / 3600])
+    series.append([6], [1 / 3600])
+    first = homework.Running(4, 1 / 3600, 75)
+    assert series.segments.distance[1] == first.get_distance()
+    assert series.segments.speed[1] == first.get_mean_speed()
+    assert series.segments.calories[1] == first.get_spent_calories()
+    info = series.get_range_info(1, 3)
+    assert info.duration == pytest.approx(2 / 3600)
+    assert info.distance == pytest.approx(10 * 0.65 / 1000)
+    assert info.calories == pytest.approx(
+        sum(series.segments.calories[1:3])
+    )
+    with pytest.raises(ValueError):
+        series.append([1], [1 / 3600], [1])
+    for start, stop in ((0, 0), (2, 1), (1, 1), (-1, 2), (0, 4)):
+        with pytest.raises(ValueError):
+            series.get_range_info(start, stop)
+    swimming = timeseries.TrainingSeries(homework.Swimming, (80, 25))
+    with pytest.raises(ValueError):
+        swimming.append([10, 10], [1 / 60, 1 / 60], [1])
+    assert len(swimming) == 0
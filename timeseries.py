@@ -0,0 +1,127 @@
+import operator
+from array import array
+from dataclasses import dataclass, field
+from itertools import accumulate, islice
+from typing import Iterable
+
+import homework
+
+SAMPLE_FIELDS = {
+    homework.Training: ('action', 'duration'),
+    homework.Swimming: ('action', 'duration', 'count_pool'),
+}
+PHRASE_SAMPLES_ERROR = 'для {} нужны колонки отсчётов {}, передано {}'
+PHRASE_RANGE_ERROR = 'диапазон отрезков [{}, {}) вне 0..{} или пуст'
+
+
+def get_sample_fields(training_class: type) -> tuple[str, ...]:
+    """Получить поля тренировки, которые суммируются по отсчётам."""
+    for base in training_class.__mro__:
+        if base in SAMPLE_FIELDS:
+            return SAMPLE_FIELDS[base]
+    return SAMPLE_FIELDS[homework.Training]
+
+
+def extend_cumulative(target: array, values: Iterable[float]) -> None:
+    """Дописать нарастающие суммы значений, продолжая последнюю."""
+    start = target[-1] if target else 0.0
+    target.extend(islice(accumulate(values, initial=start), 1, None))
+
+
+@dataclass
+class TrainingSeries:
+    """Тренировка из последовательных отсчётов трекера.
+
+    Колонки отсчётов — поля `SAMPLE_FIELDS` класса тренировки за
+    каждый отрезок, `constants` — остальные поля в порядке класса,
+    например вес и рост. Метрики считаются пакетным методом класса
+    только для новых отрезков, нарастающие суммы продолжаются.
+    """
+    training_class: type
+    constants: tuple[float, ...]
+    field_names: tuple[str, ...] = field(init=False, repr=False)
+    sample_fields: tuple[str, ...] = field(init=False, repr=False)
+    segments: homework.BatchResult = field(init=False, repr=False)
+    elapsed: array = field(init=False, repr=False)
+    covered: array = field(init=False, repr=False)
+    travelled: array = field(init=False, repr=False)
+    burned: array = field(init=False, repr=False)
+    totals: dict[str, float] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.field_names = homework.get_field_names(self.training_class)
+        self.sample_fields = get_sample_fields(self.training_class)
+        self.segments = homework.BatchResult(
+            self.training_class.__name__, [], [], [], []
+        )
+        self.elapsed = array('d')
+        self.covered = array('d')
+        self.travelled = array('d')
+        self.burned = array('d')
+        self.totals = dict.fromkeys(self.sample_fields, 0)
+
+    def __len__(self) -> int:
+        return len(self.elapsed)
+
+    def append(self, *samples: list[float]) -> None:
+        """Добавить отсчёты, рассчитав только новые отрезки."""
+        if len(samples) != len(self.sample_fields):
+            raise ValueError(PHRASE_SAMPLES_ERROR.format(
+                self.training_class.__name__, self.sample_fields,
+                len(samples)
+            ))
+        count = len(samples[0])
+        columns = dict(zip(self.sample_fields, samples))
+        result = self.training_class.calculate_batch(*(
+            value if name in columns else [value] * count
+            for name, value in zip(
+                self.field_names, self.get_arguments(columns)
+            )
+        ))
+        for name, values in columns.items():
+            self.totals[name] = sum(values, self.totals[name])
+        for name in ('duration', 'distance', 'speed', 'calories'):
+            getattr(self.segments, name).extend(getattr(result, name))
+        extend_cumulative(self.elapsed, result.duration)
+        extend_cumulative(self.covered, result.distance)
+        extend_cumulative(self.travelled, map(
+            operator.mul, result.speed, result.duration
+        ))
+        extend_cumulative(self.burned, result.calories)
+
+    def get_range_info(self, start: int, stop: int) -> homework.InfoMessage:
+        """Получить сводку по отрезкам [start, stop) из нарастающих сумм.
+
+        Скорость — средняя по времени скорость отрезков, калории — сумма
+        калорий отрезков. Для ходьбы калории зависят от квадрата
+        скорости, поэтому сумма по отрезкам отличается от итогов
+        `show_training_info` по суммарному пакету.
+        """
+        if not 0 <= start < stop <= len(self):
+            raise ValueError(PHRASE_RANGE_ERROR.format(start, stop, len(self)))
+        duration, distance, travelled, calories = (
+            cumulative[stop - 1] - (cumulative[start - 1] if start else 0)
+            for cumulative in (
+                self.elapsed, self.covered, self.travelled, self.burned
+            )
+        )
+        return homework.InfoMessage(
+            self.training_class.__name__, duration, distance,
+            travelled / duration, calories
+        )
+
+    def get_arguments(self, samples: dict[str, object]) -> list[object]:
+        """Расставить значения отсчётов и постоянные поля по порядку."""
+        constants = iter(self.constants)
+        return [
+            samples[name] if name in samples else next(constants)
+            for name in self.field_names
+        ]
+
+    def collapse(self) -> homework.Training:
+        """Получить обычную тренировку по суммам всех отсчётов."""
+        return self.training_class(*self.get_arguments(self.totals))
+
+    def show_training_info(self) -> homework.InfoMessage:
+        """Получить итоги тренировки так же, как для суммарного пакета."""
+        return self.collapse().show_training_info()